@@ -1,17 +1,101 @@
 import os
+import sys
+import json
+import hashlib
+import threading
+import argparse
+import joblib
+import numpy as np
 import pandas as pd
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.preprocessing import LabelEncoder
+from instrumentation import timed
 
-# Load dataset
-def load_dataset():
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(base_dir, "..", "data", "car_maintenance.csv")
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "..", "data", "car_maintenance.csv")
+ARTIFACT_DIR = os.path.join(BASE_DIR, "..", "models")
+
+# Everything that changes the fitted model belongs here, since it is part of the artifact key
+TRAINING_CONFIG = {
+    "estimator": "DecisionTreeClassifier",
+    "params": {},
+    "categorical_cols": ['make', 'model', 'engine_type', 'driving_condition', 'maintenance_labels'],
+    "features": ['mileage', 'year', 'driving_condition'],
+    "typed_loader": True,
+    "training_cache": True,
+}
+
+# Column types for the typed loader; text columns become pandas categories
+DATASET_DTYPES = {
+    'make': 'category',
+    'model': 'category',
+    'engine_type': 'category',
+    'driving_condition': 'category',
+    'maintenance_labels': 'category',
+    # Decision trees work in float32 internally, so this loses nothing
+    'mileage': 'float32',
+    'year': 'float32',
+}
 
+def dataset_columns(config=TRAINING_CONFIG):
+    """Columns the feature set actually needs: the features plus the label."""
+    return list(dict.fromkeys(config["features"] + ['maintenance_labels']))
+
+def _resolve_engine(engine, chunksize):
+    if engine != "auto":
+        return engine
+    if chunksize is None:
+        try:
+            import pyarrow  # noqa: F401
+            return "pyarrow"
+        except ImportError:
+            pass
+    return None
+
+def iter_dataset(data_path=DATA_PATH, chunksize=100000, config=TRAINING_CONFIG):
+    """
+    Yield the dataset in typed, column-pruned chunks with missing labels dropped.
+    Use this for files that do not fit in memory.
+    """
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"Dataset not found at {data_path}")
+
+    usecols = dataset_columns(config)
+    dtypes = {col: dtype for col, dtype in DATASET_DTYPES.items() if col in usecols}
+    for chunk in pd.read_csv(data_path, encoding="ISO-8859-1", usecols=usecols, dtype=dtypes, chunksize=chunksize):
+        yield chunk.dropna(subset=['maintenance_labels'])
+
+def _concat_categorical_chunks(chunks):
+    # Align categories first, otherwise concat falls back to object columns
+    if not chunks:
+        return pd.DataFrame()
+    for col in chunks[0].select_dtypes('category').columns:
+        categories = sorted(set().union(*(chunk[col].cat.categories for chunk in chunks)))
+        for chunk in chunks:
+            chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+# Load dataset
+def load_dataset(data_path=DATA_PATH, typed=False, engine="auto", chunksize=None, config=TRAINING_CONFIG):
+    """
+    Load the maintenance dataset.
+    With typed=True only the columns the feature set needs are read, text columns are
+    stored as categories and numbers as float32; `engine` selects the CSV parser
+    ("auto" uses pyarrow when it is installed) and `chunksize` bounds peak memory
+    while parsing by reading the file in pieces.
+    """
     if not os.path.exists(data_path):
         raise FileNotFoundError(f"Dataset not found at {data_path}")
 
-    df = pd.read_csv(data_path, encoding="ISO-8859-1")
+    if not typed:
+        df = pd.read_csv(data_path, encoding="ISO-8859-1")
+    elif chunksize:
+        df = _concat_categorical_chunks(list(iter_dataset(data_path, chunksize, config)))
+    else:
+        usecols = dataset_columns(config)
+        dtypes = {col: dtype for col, dtype in DATASET_DTYPES.items() if col in usecols}
+        df = pd.read_csv(data_path, encoding="ISO-8859-1", usecols=usecols, dtype=dtypes,
+                         engine=_resolve_engine(engine, chunksize))
 
     # Drop rows with missing values in the 'maintenance_labels' column
     df = df.dropna(subset=['maintenance_labels'])
@@ -22,32 +106,480 @@ def load_dataset():
 
     return df
 
+def memory_footprint(df):
+    """Return the in-memory size of a DataFrame, in bytes, overall and per column."""
+    per_column = df.memory_usage(deep=True, index=True)
+    return {"rows": len(df), "total_bytes": int(per_column.sum()),
+            "columns": {str(col): int(size) for col, size in per_column.items()}}
+
+def scan_memory_footprint(data_path=DATA_PATH, chunksize=100000, config=TRAINING_CONFIG):
+    """
+    Estimate the typed loader's footprint for the whole file by scanning it in chunks,
+    without ever holding more than one chunk in memory.
+    """
+    rows, numeric_bytes, categories = 0, 0, {}
+    for chunk in iter_dataset(data_path, chunksize, config):
+        rows += len(chunk)
+        for col in chunk.columns:
+            if isinstance(chunk[col].dtype, pd.CategoricalDtype):
+                categories.setdefault(col, set()).update(chunk[col].cat.categories)
+            else:
+                numeric_bytes += chunk[col].memory_usage(index=False, deep=True)
+    columns = {col: pd.Series(pd.Categorical([], categories=sorted(values))).memory_usage(deep=True, index=False)
+               + rows * np.min_scalar_type(-max(len(values), 1)).itemsize
+               for col, values in categories.items()}
+    return {"rows": rows, "total_bytes": int(numeric_bytes + sum(columns.values())),
+            "file_bytes": os.path.getsize(data_path)}
+
+def _encode_column(series):
+    """LabelEncoder-compatible encoding; category columns are encoded from their codes without copying strings."""
+    le = LabelEncoder()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.cat.remove_unused_categories()
+        series = series.cat.reorder_categories(sorted(series.cat.categories))
+        le.classes_ = np.asarray(series.cat.categories, dtype=object)
+        return series.cat.codes, le
+    return le.fit_transform(series), le
+
 # Preprocess dataset
-def preprocess_data(df):
-    # Encode categorical features
+def preprocess_data(df, config=TRAINING_CONFIG):
+    # Encode categorical features (the typed loader prunes the ones the model does not use)
     label_encoders = {}
-    categorical_cols = ['make', 'model', 'engine_type', 'driving_condition', 'maintenance_labels']
-    for col in categorical_cols:
-        le = LabelEncoder()
-        df[col] = le.fit_transform(df[col])
-        label_encoders[col] = le
+    for col in config["categorical_cols"]:
+        if col not in df.columns:
+            continue
+        df[col], label_encoders[col] = _encode_column(df[col])
 
     # Features and labels
-    features = ['mileage', 'year', 'driving_condition']
-    X = df[features]
+    X = df[config["features"]]
     y = df['maintenance_labels']
 
     return X, y, label_encoders
 
+# Columnar training-data cache: the encoded output of load_dataset() + preprocess_data() stored as .npy
+# files next to the model artifacts. Arrays are opened with mmap, so loading is zero-copy and worker
+# processes reading the same cache share the page cache instead of each holding a private copy.
+TRAINING_CACHE_DIR = os.path.join(ARTIFACT_DIR, "training_cache")
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _preprocessing_config(config):
+    # Only the settings that change the encoded arrays; estimator params do not invalidate the cache
+    return {key: config.get(key) for key in ("features", "categorical_cols", "typed_loader")}
+
+def training_cache_path(data_path=DATA_PATH, config=TRAINING_CONFIG):
+    identity = json.dumps([os.path.abspath(data_path), _preprocessing_config(config)], sort_keys=True)
+    return os.path.join(TRAINING_CACHE_DIR, hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16])
+
+def _read_cache_manifest(cache_path):
+    try:
+        with open(os.path.join(cache_path, "manifest.json"), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def training_cache_is_fresh(data_path=DATA_PATH, config=TRAINING_CONFIG):
+    """
+    True when the cache matches the source CSV. A matching size and mtime is trusted;
+    otherwise the CSV is rehashed, so touching an unchanged file does not force a rebuild.
+    """
+    cache_path = training_cache_path(data_path, config)
+    manifest = _read_cache_manifest(cache_path)
+    if manifest is None:
+        return False
+    stat = os.stat(data_path)
+    if (manifest["source_size"], manifest["source_mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+        return True
+    if manifest["source_size"] != stat.st_size or manifest["source_hash"] != _hash_file(data_path):
+        return False
+    manifest["source_mtime_ns"] = stat.st_mtime_ns
+    _write_cache_manifest(cache_path, manifest)
+    return True
+
+def _write_cache_manifest(cache_path, manifest):
+    tmp_path = os.path.join(cache_path, f"manifest.json.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file)
+    os.replace(tmp_path, os.path.join(cache_path, "manifest.json"))
+
+def build_training_cache(data_path=DATA_PATH, config=TRAINING_CONFIG):
+    """Load and preprocess the CSV once and store the encoded arrays; return the cache directory."""
+    stat = os.stat(data_path)
+    source_hash = _hash_file(data_path)
+    df = load_dataset(data_path, typed=config.get("typed_loader", False), config=config)
+    X, y, label_encoders = preprocess_data(df, config)
+
+    cache_path = training_cache_path(data_path, config)
+    os.makedirs(cache_path, exist_ok=True)
+    # The manifest is written last and marks the cache as complete
+    if os.path.exists(os.path.join(cache_path, "manifest.json")):
+        os.remove(os.path.join(cache_path, "manifest.json"))
+    # Replace files by rename so processes that still have the old arrays mapped are unaffected
+    for name, save in (("X.npy", lambda path: np.save(path, np.ascontiguousarray(X.to_numpy(dtype=np.float32)))),
+                       ("y.npy", lambda path: np.save(path, np.ascontiguousarray(y.to_numpy()))),
+                       ("label_encoders.joblib", lambda path: joblib.dump(label_encoders, path))):
+        tmp_path = os.path.join(cache_path, f"{os.getpid()}.tmp.{name}")
+        save(tmp_path)
+        os.replace(tmp_path, os.path.join(cache_path, name))
+    _write_cache_manifest(cache_path, {
+        "source": os.path.abspath(data_path),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_hash": source_hash,
+        "config": _preprocessing_config(config),
+        "features": list(X.columns),
+        "rows": len(X),
+    })
+    return cache_path
+
+def load_training_cache(data_path=DATA_PATH, config=TRAINING_CONFIG, mmap=True):
+    """
+    Return (X, y, label_encoders) from the cache, building it first if it is missing or stale.
+    X is a DataFrame view over the memory-mapped array, so no rows are copied.
+    """
+    if not training_cache_is_fresh(data_path, config):
+        build_training_cache(data_path, config)
+    cache_path = training_cache_path(data_path, config)
+    manifest = _read_cache_manifest(cache_path)
+    mmap_mode = "r" if mmap else None
+    X = pd.DataFrame(np.load(os.path.join(cache_path, "X.npy"), mmap_mode=mmap_mode),
+                     columns=manifest["features"], copy=False)
+    y = np.load(os.path.join(cache_path, "y.npy"), mmap_mode=mmap_mode)
+    label_encoders = joblib.load(os.path.join(cache_path, "label_encoders.joblib"))
+    return X, y, label_encoders
+
+def load_training_data(data_path=DATA_PATH, config=TRAINING_CONFIG):
+    """Return (X, y, label_encoders) for training or evaluation, from the columnar cache when enabled."""
+    if config.get("training_cache", True):
+        return load_training_cache(data_path, config)
+    df = load_dataset(data_path, typed=config.get("typed_loader", False), config=config)
+    return preprocess_data(df, config)
+
+# Estimator families that can be named in a training config
+def make_estimator(config):
+    from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
+    estimators = {
+        "DecisionTreeClassifier": DecisionTreeClassifier,
+        "RandomForestClassifier": RandomForestClassifier,
+        "GradientBoostingClassifier": GradientBoostingClassifier,
+        "HistGradientBoostingClassifier": HistGradientBoostingClassifier,
+    }
+    if config["estimator"] not in estimators:
+        raise ValueError(f"Unknown estimator: {config['estimator']}")
+    return estimators[config["estimator"]](**config["params"])
+
+# The model promoted by model selection, if any, replaces the default estimator and params
+PROMOTED_CONFIG_PATH = os.path.join(ARTIFACT_DIR, "promoted_config.json")
+
+def active_training_config():
+    """TRAINING_CONFIG with the promoted estimator and params applied."""
+    try:
+        with open(PROMOTED_CONFIG_PATH, "r", encoding="utf-8") as file:
+            promoted = json.load(file)
+    except (OSError, ValueError):
+        return TRAINING_CONFIG
+    return dict(TRAINING_CONFIG, estimator=promoted["estimator"], params=promoted["params"])
+
+def promote_config(estimator, params):
+    """Make the given estimator and params the ones get_model() trains and serves."""
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    tmp_path = f"{PROMOTED_CONFIG_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump({"estimator": estimator, "params": params}, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, PROMOTED_CONFIG_PATH)
+    return active_training_config()
+
 # Train AI model
-def train_model():
-    df = load_dataset()
-    X, y, label_encoders = preprocess_data(df)
-    model = DecisionTreeClassifier()
+@timed("model.train_model")
+def train_model(data_path=DATA_PATH, config=TRAINING_CONFIG):
+    X, y, label_encoders = load_training_data(data_path, config)
+    model = make_estimator(config)
     model.fit(X, y)
     return model, label_encoders
 
+# Model registry: fitted artifacts are stored on disk keyed by the dataset and config they came from
+_registry_lock = threading.Lock()
+_loaded = {}
+# Callables invoked as listener(version) whenever get_model() loads a different model into this process
+_model_listeners = []
+
+def add_model_listener(listener):
+    """Register a callable notified with the new version whenever a new model artifact is loaded."""
+    _model_listeners.append(listener)
+
+def _set_loaded(slot, entry):
+    previous = _loaded.get(slot)
+    _loaded[slot] = entry
+    if previous is None or previous["key"] != entry["key"] or previous["model"] is not entry["model"]:
+        for listener in list(_model_listeners):
+            listener(entry["key"])
+
+def compute_artifact_key(data_path=DATA_PATH, config=TRAINING_CONFIG):
+    """Return a content hash of the training CSV combined with the training config."""
+    digest = hashlib.sha256(_hash_file(data_path).encode("ascii"))
+    digest.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def artifact_path(key):
+    return os.path.join(ARTIFACT_DIR, f"model-{key}.joblib")
+
+def save_artifact(model, label_encoders, key, config=TRAINING_CONFIG):
+    """Serialize a fitted model and its label encoders under the given key."""
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    path = artifact_path(key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump({"key": key, "config": config, "model": model, "label_encoders": label_encoders}, tmp_path)
+    # Atomic rename so a concurrent reader never sees a half-written artifact
+    os.replace(tmp_path, path)
+    return path
+
+def load_artifact(key):
+    """Load a stored artifact, or return None if it does not exist yet."""
+    path = artifact_path(key)
+    if not os.path.exists(path):
+        return None
+    artifact = joblib.load(path)
+    return artifact["model"], artifact["label_encoders"]
+
+def build_artifact(data_path=DATA_PATH, config=None, force=False):
+    """Train and store the artifact for the current dataset unless it already exists."""
+    config = config or active_training_config()
+    key = compute_artifact_key(data_path, config)
+    if not force and os.path.exists(artifact_path(key)):
+        return key, False
+    model, label_encoders = train_model(data_path, config)
+    save_artifact(model, label_encoders, key, config)
+    return key, True
+
+@timed("model.get_model")
+def get_model(data_path=DATA_PATH, config=None):
+    """
+    Return (model, label_encoders), loading them at most once per process.
+    The CSV is only rehashed when its size or mtime changes, and the model is
+    only retrained when no artifact exists for the resulting hash. Without an explicit
+    config the promoted estimator (see model_search.py) is used.
+    With CAR_SERVICE_MODEL_MODE=incremental the incrementally updated model is served instead.
+    """
+    if MODEL_MODE == "incremental":
+        return _get_incremental_model(data_path)
+
+    config = config or active_training_config()
+    stat = os.stat(data_path)
+    fingerprint = (stat.st_size, stat.st_mtime_ns, json.dumps(config, sort_keys=True))
+    cached = _loaded.get(data_path)
+    if cached and cached["fingerprint"] == fingerprint:
+        return cached["model"], cached["label_encoders"]
+
+    with _registry_lock:
+        cached = _loaded.get(data_path)
+        if cached and cached["fingerprint"] == fingerprint:
+            return cached["model"], cached["label_encoders"]
+
+        key = compute_artifact_key(data_path, config)
+        artifact = load_artifact(key)
+        if artifact is None:
+            model, label_encoders = train_model(data_path, config)
+            save_artifact(model, label_encoders, key, config)
+        else:
+            model, label_encoders = artifact
+
+        _set_loaded(data_path, {"fingerprint": fingerprint, "key": key,
+                                "model": model, "label_encoders": label_encoders})
+        return model, label_encoders
+
+def get_model_version(data_path=DATA_PATH):
+    """Return the artifact key of the model currently loaded in this process, if any."""
+    cached = _loaded.get("incremental" if MODEL_MODE == "incremental" else data_path)
+    return cached["key"] if cached else None
+
+# Incremental training: a model that supports partial_fit (or warm start) is updated from newly
+# labelled records only, with category codes that never change. A full rebuild remains the fallback.
+INCREMENTAL_CONFIG = {
+    "estimator": "GaussianNB",
+    "params": {},
+    "features": ['mileage', 'year', 'driving_condition'],
+    "categorical_cols": ['driving_condition', 'maintenance_labels'],
+    "typed_loader": True,
+    "training_cache": True,
+    # Force a full rebuild after this many incremental updates
+    "full_rebuild_every": 50,
+    # Booking statuses that count as a completed, labelled service (an approved booking has not
+    # been serviced yet)
+    "labelled_statuses": ['Completed'],
+}
+INCREMENTAL_ARTIFACT_PATH = os.path.join(ARTIFACT_DIR, "incremental-latest.joblib")
+# "full" serves the DecisionTree artifact, "incremental" serves the incrementally updated model
+MODEL_MODE = os.environ.get("CAR_SERVICE_MODEL_MODE", "full")
+
+class AppendOnlyLabelEncoder(LabelEncoder):
+    """LabelEncoder whose codes never change: unseen categories are appended after the known ones."""
+
+    @classmethod
+    def from_encoder(cls, encoder):
+        append_only = cls()
+        append_only.classes_ = np.asarray(encoder.classes_, dtype=object)
+        return append_only
+
+    def unseen(self, values):
+        """Return the categories in values that are not known yet, without adding them."""
+        known = set(self.classes_.tolist())
+        return [value for value in pd.unique(pd.Series(values).dropna()) if value not in known]
+
+    def extend(self, values):
+        """Append categories not seen before and return them."""
+        new = self.unseen(values)
+        if new:
+            self.classes_ = np.concatenate([self.classes_, np.asarray(new, dtype=object)])
+        return new
+
+def _make_incremental_estimator(config):
+    from sklearn.naive_bayes import GaussianNB
+    from sklearn.linear_model import SGDClassifier
+    estimators = {"GaussianNB": GaussianNB, "SGDClassifier": SGDClassifier}
+    return estimators[config["estimator"]](**config["params"])
+
+def _encode_records(records, label_encoders, features):
+    X = pd.DataFrame({
+        col: pd.Index(label_encoders[col].classes_).get_indexer(records[col]) if col in label_encoders
+        else records[col].astype(np.float32)
+        for col in features
+    }, columns=features)
+    y = pd.Index(label_encoders['maintenance_labels'].classes_).get_indexer(records['maintenance_labels'])
+    return X, y
+
+def build_incremental_model(data_path=DATA_PATH, config=INCREMENTAL_CONFIG, records=None):
+    """
+    Full rebuild of the incremental model from the training data plus any labelled
+    booking records; returns the saved artifact.
+    """
+    X, y, label_encoders = load_training_data(data_path, config)
+    label_encoders = {col: AppendOnlyLabelEncoder.from_encoder(le) for col, le in label_encoders.items()}
+    watermark = 0
+    if records is not None and len(records):
+        for col in config["features"] + ['maintenance_labels']:
+            if col in label_encoders:
+                label_encoders[col].extend(records[col])
+        X_new, y_new = _encode_records(records, label_encoders, config["features"])
+        X = pd.concat([X, X_new.astype(X.dtypes.to_dict())], ignore_index=True)
+        y = np.concatenate([np.asarray(y), y_new])
+        watermark = int(records['status_revision'].max())
+
+    model = _make_incremental_estimator(config)
+    model.partial_fit(X, y, classes=np.arange(len(label_encoders['maintenance_labels'].classes_)))
+    artifact = {"version": f"inc-{compute_artifact_key(data_path, config)}-{watermark}", "model": model,
+                "label_encoders": label_encoders, "watermark": watermark, "updates_since_rebuild": 0}
+    save_incremental_artifact(artifact)
+    return artifact
+
+def save_incremental_artifact(artifact):
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    tmp_path = f"{INCREMENTAL_ARTIFACT_PATH}.{os.getpid()}.tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, INCREMENTAL_ARTIFACT_PATH)
+
+def load_incremental_artifact():
+    if not os.path.exists(INCREMENTAL_ARTIFACT_PATH):
+        return None
+    return joblib.load(INCREMENTAL_ARTIFACT_PATH)
+
+def fetch_labelled_records(conn, after_revision=0, config=INCREMENTAL_CONFIG):
+    """
+    Completed bookings joined to their cars, as a DataFrame, for bookings whose status changed
+    after the given status revision (so a booking completed after newer ones were learned is still seen).
+    """
+    statuses = config["labelled_statuses"]
+    rows = conn.execute(f'''
+        SELECT b.id AS booking_id, b.status_revision, c.mileage, c.year, c.driving_condition,
+               b.service_type AS maintenance_labels
+        FROM bookings b JOIN cars c ON c.id = b.car_id
+        WHERE b.status_revision > ? AND b.status IN ({', '.join('?' * len(statuses))})
+        ORDER BY b.status_revision
+    ''', [after_revision] + list(statuses)).fetchall()
+    return pd.DataFrame([tuple(row) for row in rows],
+                        columns=['booking_id', 'status_revision', 'mileage', 'year', 'driving_condition',
+                                 'maintenance_labels'])
+
+def update_model(model, label_encoders, records, config=INCREMENTAL_CONFIG):
+    """
+    Update a fitted model in place with new labelled records.
+    Categories are appended to the encoders, never renumbered. Raises ValueError when the
+    records contain a maintenance label the model has no class for, since that needs a full rebuild;
+    the encoders are left untouched in that case.
+    """
+    features = config["features"]
+    new_labels = label_encoders['maintenance_labels'].unseen(records['maintenance_labels'])
+    if new_labels or len(label_encoders['maintenance_labels'].classes_) > len(model.classes_):
+        raise ValueError(f"New maintenance labels {new_labels} require a full rebuild.")
+    for col in features:
+        if col in label_encoders:
+            label_encoders[col].extend(records[col])
+
+    X, y = _encode_records(records, label_encoders, features)
+    if hasattr(model, "partial_fit"):
+        model.partial_fit(X, y)
+    elif getattr(model, "warm_start", False) and hasattr(model, "n_estimators"):
+        model.n_estimators += config.get("warm_start_step", 10)
+        model.fit(X, y)
+    else:
+        raise ValueError(f"{type(model).__name__} supports neither partial_fit nor warm start.")
+    return model
+
+def incremental_update(data_path=DATA_PATH, config=INCREMENTAL_CONFIG, force_rebuild=False):
+    """
+    Apply labelled records that arrived since the last update and save a new model version.
+    Falls back to a full rebuild when forced, when no incremental model exists, after
+    `full_rebuild_every` updates, or when a new maintenance label appears.
+    Returns (artifact, mode) where mode is "rebuild", "update" or "unchanged".
+    """
+    from database import get_db_connection
+
+    artifact = None if force_rebuild else load_incremental_artifact()
+    rebuild = artifact is None or artifact["updates_since_rebuild"] >= config["full_rebuild_every"]
+    conn = get_db_connection()
+    try:
+        # A rebuild replays every labelled record; an update only reads bookings whose status
+        # changed after the watermark (a status revision)
+        records = fetch_labelled_records(conn, 0 if rebuild else artifact["watermark"], config)
+        if not rebuild and not records.empty:
+            try:
+                update_model(artifact["model"], artifact["label_encoders"], records, config)
+            except ValueError:
+                rebuild = True
+                records = fetch_labelled_records(conn, 0, config)
+    finally:
+        conn.close()
+
+    if rebuild:
+        return build_incremental_model(data_path, config, records), "rebuild"
+    if records.empty:
+        return artifact, "unchanged"
+
+    latest = int(records['status_revision'].max())
+    artifact.update(watermark=latest, updates_since_rebuild=artifact["updates_since_rebuild"] + 1,
+                    version=f"{artifact['version'].rsplit('-', 1)[0]}-{latest}")
+    save_incremental_artifact(artifact)
+    return artifact, "update"
+
+def _get_incremental_model(data_path=DATA_PATH):
+    # Reload whenever the artifact file is replaced by an update
+    mtime = os.stat(INCREMENTAL_ARTIFACT_PATH).st_mtime_ns if os.path.exists(INCREMENTAL_ARTIFACT_PATH) else None
+    cached = _loaded.get("incremental")
+    if cached and mtime is not None and cached["fingerprint"] == mtime:
+        return cached["model"], cached["label_encoders"]
+    with _registry_lock:
+        artifact = load_incremental_artifact() or build_incremental_model(data_path)
+        _set_loaded("incremental", {"fingerprint": os.stat(INCREMENTAL_ARTIFACT_PATH).st_mtime_ns,
+                                    "key": artifact["version"], "model": artifact["model"],
+                                    "label_encoders": artifact["label_encoders"]})
+        return artifact["model"], artifact["label_encoders"]
+
 # Get service recommendation
+@timed("model.recommend_services")
 def recommend_services(model, label_encoders, car_details):
     # Validate input data
     required_features = ['mileage', 'year', 'driving_condition']
@@ -76,5 +608,86 @@ def recommend_services(model, label_encoders, car_details):
     # Predict maintenance label
     prediction = model.predict(input_data)
     maintenance_label = label_encoders['maintenance_labels'].inverse_transform(prediction)[0]
-    
-    return maintenance_label
\ No newline at end of file
+
+    return maintenance_label
+
+# Get service recommendations for many cars at once
+def recommend_services_batch(model, label_encoders, cars, chunk_size=10000):
+    """
+    Yield arrays of maintenance labels for `cars`, one array per chunk, in input order.
+    `cars` is a DataFrame with the feature columns or an array with one row per car in feature order.
+    Output matches recommend_services() row for row, including the -1 fallback for unseen categories.
+    """
+    features = ['mileage', 'year', 'driving_condition']
+    if isinstance(cars, pd.DataFrame):
+        missing = [feature for feature in features if feature not in cars.columns]
+        if missing:
+            raise ValueError(f"Missing required feature: {missing[0]}")
+        cars = cars[features]
+    else:
+        cars = pd.DataFrame(np.asarray(cars, dtype=object).reshape(-1, len(features)), columns=features)
+
+    invalid = cars.isna().any()
+    if invalid.any():
+        raise ValueError(f"Invalid value for feature: {invalid[invalid].index[0]}")
+
+    # Hash-based lookup tables; get_indexer returns -1 for categories not seen during training
+    lookups = {col: pd.Index(label_encoders[col].classes_) for col in features if col in label_encoders}
+    label_classes = label_encoders['maintenance_labels'].classes_
+
+    chunk_size = chunk_size or len(cars) or 1
+    for start in range(0, len(cars), chunk_size):
+        chunk = cars.iloc[start:start + chunk_size]
+        encoded = pd.DataFrame({
+            col: lookups[col].get_indexer(chunk[col]) if col in lookups else chunk[col].to_numpy()
+            for col in features
+        }, columns=features)
+        prediction = model.predict(encoded)
+        yield label_classes[prediction]
+
+# Pre-build model artifacts at deploy time: python ai_model.py build
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage trained model artifacts.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Train and store the artifact for the current dataset")
+    build_parser.add_argument("--data", default=DATA_PATH, help="Path to car_maintenance.csv")
+    build_parser.add_argument("--force", action="store_true", help="Retrain even if the artifact exists")
+
+    key_parser = subparsers.add_parser("key", help="Print the artifact key for the current dataset")
+    key_parser.add_argument("--data", default=DATA_PATH, help="Path to car_maintenance.csv")
+
+    update_parser = subparsers.add_parser("update", help="Update the incremental model from new completed bookings")
+    update_parser.add_argument("--data", default=DATA_PATH, help="Path to car_maintenance.csv")
+    update_parser.add_argument("--rebuild", action="store_true", help="Force a full rebuild")
+
+    cache_parser = subparsers.add_parser("cache", help="Build the columnar training-data cache")
+    cache_parser.add_argument("--data", default=DATA_PATH, help="Path to car_maintenance.csv")
+
+    profile_parser = subparsers.add_parser("profile", help="Report the typed loader's memory footprint")
+    profile_parser.add_argument("--data", default=DATA_PATH, help="Path to car_maintenance.csv")
+    profile_parser.add_argument("--chunksize", type=int, default=100000, help="Rows per chunk while scanning")
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        key, trained = build_artifact(args.data, force=args.force)
+        status = "Built" if trained else "Up to date"
+        print(f"{status}: {artifact_path(key)}")
+    elif args.command == "key":
+        print(compute_artifact_key(args.data, active_training_config()))
+    elif args.command == "update":
+        artifact, mode = incremental_update(args.data, force_rebuild=args.rebuild)
+        print(f"{mode}: {artifact['version']} (watermark {artifact['watermark']})")
+    elif args.command == "cache":
+        if training_cache_is_fresh(args.data):
+            print(f"Up to date: {training_cache_path(args.data)}")
+        else:
+            print(f"Built: {build_training_cache(args.data)}")
+    elif args.command == "profile":
+        report = scan_memory_footprint(args.data, args.chunksize)
+        print(f"{report['rows']} rows: {report['total_bytes'] / 2**20:.1f} MiB in memory "
+              f"({report['file_bytes'] / 2**20:.1f} MiB on disk)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import os
+import uuid
+from collections import deque
+from database import get_db_connection, db_connection
+
+# Chat history settings (overridable through the environment)
+CHAT_BUFFER_SIZE = int(os.environ.get("CAR_SERVICE_CHAT_BUFFER_SIZE", 50))
+CHAT_WINDOW = int(os.environ.get("CAR_SERVICE_CHAT_WINDOW", 20))
+
+class ChatHistory:
+    """
+    One chat session's messages. Every message is written to chat_messages as it is
+    added; only the newest CHAT_BUFFER_SIZE stay in memory, and older ones are read back
+    from the table a page at a time when the user asks for them.
+    """
+
+    def __init__(self, user_id=None, session_id=None, buffer_size=CHAT_BUFFER_SIZE):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.user_id = user_id
+        self.buffer = deque(maxlen=buffer_size)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, role, content):
+        with db_connection() as conn:
+            message_id = conn.execute('''
+                INSERT INTO chat_messages (session_id, user_id, role, content) VALUES (?, ?, ?, ?)
+            ''', (self.session_id, self.user_id, role, content)).lastrowid
+        message = {"id": message_id, "role": role, "content": content}
+        self.buffer.append(message)
+        self.count += 1
+        return message
+
+    def load_earlier(self, before_id, limit):
+        """Up to `limit` persisted messages older than before_id, oldest first."""
+        conn = get_db_connection()
+        try:
+            rows = conn.execute('''
+                SELECT id, role, content FROM chat_messages
+                WHERE session_id = ? AND id < ? ORDER BY id DESC LIMIT ?
+            ''', (self.session_id, before_id, limit)).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in reversed(rows)]
+
+    def window(self, size=CHAT_WINDOW):
+        """The newest `size` messages, oldest first; only reads the table beyond the in-memory buffer."""
+        if size <= len(self.buffer):
+            return list(self.buffer)[-size:]
+        messages = list(self.buffer)
+        if messages and len(messages) < self.count:
+            messages = self.load_earlier(messages[0]["id"], size - len(messages)) + messages
+        return messages
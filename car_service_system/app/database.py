@@ -1,13 +1,211 @@
 import sqlite3
 import os
+import time
+import threading
+from contextlib import contextmanager
 
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'car_service.db')
 
+# Connection pool settings (overridable through the environment)
+POOL_SIZE = int(os.environ.get('CAR_SERVICE_DB_POOL_SIZE', 16))
+POOL_TIMEOUT = float(os.environ.get('CAR_SERVICE_DB_POOL_TIMEOUT', 10))
+BUSY_TIMEOUT_MS = int(os.environ.get('CAR_SERVICE_DB_BUSY_TIMEOUT_MS', 5000))
+CACHED_STATEMENTS = int(os.environ.get('CAR_SERVICE_DB_CACHED_STATEMENTS', 256))
+
+# Bookings accepted per date and time slot unless an admin sets another capacity
+SLOT_CAPACITY = int(os.environ.get('CAR_SERVICE_SLOT_CAPACITY', 3))
+
+# Callables invoked as hook(sql, elapsed_seconds) after every query
+_query_hooks = []
+
+def add_query_hook(hook):
+    """Register a callable that receives (sql, elapsed_seconds) for every executed query."""
+    _query_hooks.append(hook)
+
+def remove_query_hook(hook):
+    """Unregister a hook added with add_query_hook()."""
+    if hook in _query_hooks:
+        _query_hooks.remove(hook)
+
+def _run_query_hooks(sql, elapsed):
+    for hook in list(_query_hooks):
+        hook(sql, elapsed)
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that reports the duration of each statement to the query hooks."""
+
+    def execute(self, sql, parameters=()):
+        if not _query_hooks:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _run_query_hooks(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not _query_hooks:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _run_query_hooks(sql, time.perf_counter() - start)
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection owned by a ConnectionPool.
+    close() hands the connection back to the pool instead of closing it, so
+    existing get_db_connection() / conn.close() call sites keep working.
+    """
+
+    pool = None
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def discard(self):
+        """Really close the underlying sqlite3 connection."""
+        self.pool = None
+        super().close()
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections with per-thread reuse."""
+
+    def __init__(self, db_path, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._open = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000,
+                               cached_statements=CACHED_STATEMENTS,
+                               check_same_thread=False, factory=PooledConnection)
+        conn.row_factory = sqlite3.Row  # Allows accessing columns by name
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.pool = self
+        return conn
+
+    def acquire(self):
+        """Return this thread's connection, checking one out of the pool if needed."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            return conn
+
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No database connection available within {self.timeout}s (pool size {self.size})")
+                self._cond.wait(remaining)
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                self._open += 1
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn):
+        """Give back one checkout; the connection returns to the pool when the thread is done with it."""
+        if getattr(self._local, 'conn', None) is not conn:
+            return
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        self._local.conn = None
+
+        # Never hand a connection with an open transaction to another thread
+        if conn.in_transaction:
+            conn.rollback()
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every idle connection."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn in idle:
+            conn.discard()
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool():
+    """Return the connection pool for the current DB_PATH."""
+    path = os.path.abspath(DB_PATH)
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(path, ConnectionPool(path))
+    return pool
+
 def get_db_connection():
-    """Establish and return a database connection."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # Allows accessing columns by name
-    return conn
+    """Return a pooled database connection; call close() to hand it back."""
+    return get_pool().acquire()
+
+@contextmanager
+def db_connection():
+    """
+    Context manager around get_db_connection() that commits on success and rolls back on error.
+    If this thread's connection already has a transaction open (an outer caller owns it), the
+    block runs in a savepoint instead: success releases it into the outer transaction and an
+    error rolls back only the block's own changes.
+    """
+    conn = get_db_connection()
+    try:
+        if not conn.in_transaction:
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            return
+        conn.execute('SAVEPOINT db_connection')
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK TO db_connection')
+                conn.execute('RELEASE db_connection')
+            raise
+        if conn.in_transaction:
+            conn.execute('RELEASE db_connection')
+    finally:
+        conn.close()
 
 def init_db():
     """Initialize the database with necessary tables."""
@@ -84,8 +282,372 @@ def init_db():
     ''')
 
     conn.commit()
+    migrate(conn)
     conn.close()
     print("Database initialized successfully.")
 
+# Schema migrations, applied in order and tracked with PRAGMA user_version. A statement is SQL
+# text, or (SQL, parameters) when it needs a setting. Append new entries; never edit one that has
+# already shipped.
+MIGRATIONS = [
+    (1, "Covering indexes for per-user cars and bookings lookups", [
+        '''CREATE INDEX IF NOT EXISTS idx_cars_user
+           ON cars (user_id, make, model, year, mileage, engine_type, driving_condition)''',
+        '''CREATE INDEX IF NOT EXISTS idx_bookings_user
+           ON bookings (user_id, car_id, service_type, appointment_date, time_slot, status)''',
+    ]),
+    (2, "Indexes for admin dashboard aggregates", [
+        'CREATE INDEX IF NOT EXISTS idx_bookings_status ON bookings (status)',
+        'CREATE INDEX IF NOT EXISTS idx_bookings_service_type ON bookings (service_type)',
+    ]),
+    (3, "Email outbox columns on notifications", [
+        "ALTER TABLE notifications ADD COLUMN channel TEXT DEFAULT 'app'",
+        'ALTER TABLE notifications ADD COLUMN recipient TEXT',
+        'ALTER TABLE notifications ADD COLUMN subject TEXT',
+        "ALTER TABLE notifications ADD COLUMN status TEXT DEFAULT 'pending'",
+        'ALTER TABLE notifications ADD COLUMN attempts INTEGER DEFAULT 0',
+        'ALTER TABLE notifications ADD COLUMN next_attempt_at TEXT',
+        'ALTER TABLE notifications ADD COLUMN sent_at TEXT',
+        'ALTER TABLE notifications ADD COLUMN last_error TEXT',
+        '''CREATE INDEX IF NOT EXISTS idx_notifications_outbox
+           ON notifications (channel, status, next_attempt_at)''',
+    ]),
+    (4, "Materialized per-car recommendations", [
+        '''CREATE TABLE IF NOT EXISTS car_recommendations (
+            car_id INTEGER PRIMARY KEY,
+            recommendation TEXT NOT NULL,
+            model_version TEXT NOT NULL,
+            computed_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (car_id) REFERENCES cars(id)
+        )''',
+        '''CREATE INDEX IF NOT EXISTS idx_car_recommendations_service
+           ON car_recommendations (model_version, recommendation, car_id)''',
+        # A change to any model input makes the stored recommendation stale
+        '''CREATE TRIGGER IF NOT EXISTS trg_cars_recommendation_stale
+           AFTER UPDATE OF mileage, year, driving_condition ON cars
+           BEGIN
+               DELETE FROM car_recommendations WHERE car_id = NEW.id;
+           END''',
+    ]),
+    (5, "Slot inventory with per-date, per-slot and per-bay capacity", [
+        # bay '' is the whole workshop; per-bay rows can be added alongside it later
+        "ALTER TABLE bookings ADD COLUMN bay TEXT NOT NULL DEFAULT ''",
+        '''CREATE TABLE IF NOT EXISTS slot_inventory (
+            slot_date TEXT NOT NULL,
+            time_slot TEXT NOT NULL,
+            bay TEXT NOT NULL DEFAULT '',
+            capacity INTEGER NOT NULL,
+            reserved INTEGER NOT NULL DEFAULT 0 CHECK (reserved >= 0),
+            PRIMARY KEY (slot_date, time_slot, bay)
+        ) WITHOUT ROWID''',
+        ('''INSERT OR IGNORE INTO slot_inventory (slot_date, time_slot, bay, capacity, reserved)
+            SELECT appointment_date, time_slot, '', MAX(COUNT(*), ?), COUNT(*)
+            FROM bookings WHERE status != 'Rejected'
+            GROUP BY appointment_date, time_slot''', (SLOT_CAPACITY,)),
+        # Rejecting a booking frees its place; un-rejecting takes it back, and is refused when the
+        # slot is full (the same check reserve_slot() makes)
+        '''CREATE TRIGGER IF NOT EXISTS trg_bookings_release_slot
+           AFTER UPDATE OF status ON bookings
+           WHEN NEW.status = 'Rejected' AND OLD.status != 'Rejected'
+           BEGIN
+               UPDATE slot_inventory SET reserved = MAX(reserved - 1, 0)
+               WHERE slot_date = NEW.appointment_date AND time_slot = NEW.time_slot AND bay = NEW.bay;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_bookings_retake_slot
+           AFTER UPDATE OF status ON bookings
+           WHEN OLD.status = 'Rejected' AND NEW.status != 'Rejected'
+           BEGIN
+               SELECT RAISE(ABORT, 'slot is fully booked') FROM slot_inventory
+               WHERE slot_date = NEW.appointment_date AND time_slot = NEW.time_slot AND bay = NEW.bay
+                 AND reserved >= capacity;
+               UPDATE slot_inventory SET reserved = reserved + 1
+               WHERE slot_date = NEW.appointment_date AND time_slot = NEW.time_slot AND bay = NEW.bay;
+           END''',
+    ]),
+    (6, "Managed FAQ entries with change revisions", [
+        # Every write stamps the row with the next revision; deletes keep a tombstone so
+        # readers can apply changes since the revision they last saw
+        '''CREATE TABLE IF NOT EXISTS faq_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            question TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            revision INTEGER NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_faq_entries_revision ON faq_entries (revision)',
+    ]),
+    (7, "Persisted chat messages", [
+        '''CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            user_id INTEGER,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages (session_id, id)',
+    ]),
+    (8, "Trigger-maintained booking rollups", [
+        # ALTER TABLE cannot add a CURRENT_TIMESTAMP default, so new rows are stamped by a trigger;
+        # bookings made before this migration keep NULL and are left out of latency figures
+        'ALTER TABLE bookings ADD COLUMN created_at TEXT',
+        'ALTER TABLE bookings ADD COLUMN decided_at TEXT',
+        # Booking counts per appointment day, status, service type and time slot
+        '''CREATE TABLE IF NOT EXISTS booking_daily_counts (
+            day TEXT NOT NULL,
+            status TEXT NOT NULL,
+            service_type TEXT NOT NULL,
+            time_slot TEXT NOT NULL,
+            bookings INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, status, service_type, time_slot)
+        ) WITHOUT ROWID''',
+        # First decision (Pending -> Approved/Rejected) per decision day, with the summed wait
+        '''CREATE TABLE IF NOT EXISTS booking_decision_daily (
+            day TEXT NOT NULL,
+            status TEXT NOT NULL,
+            decisions INTEGER NOT NULL DEFAULT 0,
+            timed_decisions INTEGER NOT NULL DEFAULT 0,
+            latency_seconds REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, status)
+        ) WITHOUT ROWID''',
+        '''INSERT INTO booking_daily_counts (day, status, service_type, time_slot, bookings)
+           SELECT appointment_date, COALESCE(status, ''), service_type, time_slot, COUNT(*)
+           FROM bookings GROUP BY appointment_date, COALESCE(status, ''), service_type, time_slot''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_bookings_stamp_created
+           AFTER INSERT ON bookings
+           WHEN NEW.created_at IS NULL
+           BEGIN
+               UPDATE bookings SET created_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_bookings_rollup_insert
+           AFTER INSERT ON bookings
+           BEGIN
+               INSERT INTO booking_daily_counts (day, status, service_type, time_slot, bookings)
+               VALUES (NEW.appointment_date, COALESCE(NEW.status, ''), NEW.service_type, NEW.time_slot, 1)
+               ON CONFLICT (day, status, service_type, time_slot) DO UPDATE SET bookings = bookings + 1;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_bookings_rollup_update
+           AFTER UPDATE OF appointment_date, status, service_type, time_slot ON bookings
+           WHEN OLD.appointment_date IS NOT NEW.appointment_date OR OLD.status IS NOT NEW.status
+                OR OLD.service_type IS NOT NEW.service_type OR OLD.time_slot IS NOT NEW.time_slot
+           BEGIN
+               UPDATE booking_daily_counts SET bookings = bookings - 1
+               WHERE day = OLD.appointment_date AND status = COALESCE(OLD.status, '')
+                 AND service_type = OLD.service_type AND time_slot = OLD.time_slot;
+               DELETE FROM booking_daily_counts
+               WHERE day = OLD.appointment_date AND status = COALESCE(OLD.status, '')
+                 AND service_type = OLD.service_type AND time_slot = OLD.time_slot AND bookings <= 0;
+               INSERT INTO booking_daily_counts (day, status, service_type, time_slot, bookings)
+               VALUES (NEW.appointment_date, COALESCE(NEW.status, ''), NEW.service_type, NEW.time_slot, 1)
+               ON CONFLICT (day, status, service_type, time_slot) DO UPDATE SET bookings = bookings + 1;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_bookings_rollup_delete
+           AFTER DELETE ON bookings
+           BEGIN
+               UPDATE booking_daily_counts SET bookings = bookings - 1
+               WHERE day = OLD.appointment_date AND status = COALESCE(OLD.status, '')
+                 AND service_type = OLD.service_type AND time_slot = OLD.time_slot;
+               DELETE FROM booking_daily_counts
+               WHERE day = OLD.appointment_date AND status = COALESCE(OLD.status, '')
+                 AND service_type = OLD.service_type AND time_slot = OLD.time_slot AND bookings <= 0;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_bookings_decided
+           AFTER UPDATE OF status ON bookings
+           WHEN OLD.status = 'Pending' AND NEW.status != 'Pending' AND NEW.decided_at IS NULL
+           BEGIN
+               UPDATE bookings SET decided_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+               INSERT INTO booking_decision_daily (day, status, decisions, timed_decisions, latency_seconds)
+               VALUES (date('now'), NEW.status, 1, NEW.created_at IS NOT NULL,
+                       COALESCE((julianday('now') - julianday(NEW.created_at)) * 86400, 0))
+               ON CONFLICT (day, status) DO UPDATE SET
+                   decisions = decisions + 1,
+                   timed_decisions = timed_decisions + excluded.timed_decisions,
+                   latency_seconds = latency_seconds + excluded.latency_seconds;
+           END''',
+    ]),
+    (9, "Booking status revisions for incremental training", [
+        # Every insert and status change stamps the booking with the next revision, so a reader can
+        # fetch the bookings whose status changed since the revision it last saw. Existing rows get
+        # their id, which keeps watermarks saved as booking ids valid.
+        'ALTER TABLE bookings ADD COLUMN status_revision INTEGER NOT NULL DEFAULT 0',
+        'UPDATE bookings SET status_revision = id',
+        'CREATE INDEX IF NOT EXISTS idx_bookings_status_revision ON bookings (status_revision)',
+        '''CREATE TRIGGER IF NOT EXISTS trg_bookings_revision_insert
+           AFTER INSERT ON bookings
+           BEGIN
+               UPDATE bookings SET status_revision = (SELECT MAX(status_revision) + 1 FROM bookings)
+               WHERE id = NEW.id;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_bookings_revision_update
+           AFTER UPDATE OF status ON bookings
+           WHEN OLD.status IS NOT NEW.status
+           BEGIN
+               UPDATE bookings SET status_revision = (SELECT MAX(status_revision) + 1 FROM bookings)
+               WHERE id = NEW.id;
+           END''',
+    ]),
+]
+
+def get_schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate(conn):
+    """Apply every migration newer than the database's schema version, one transaction each."""
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version <= get_schema_version(conn):
+            continue
+        conn.execute('BEGIN')
+        try:
+            for statement in statements:
+                sql, params = statement if isinstance(statement, tuple) else (statement, ())
+                conn.execute(sql, params)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append((version, description))
+    return applied
+
+# Hot queries whose plans must stay index-backed as the tables grow
+PLANNED_QUERIES = {
+    "cars_by_user": ('SELECT * FROM cars WHERE user_id = ?', (1,)),
+    "bookings_by_user": ('SELECT * FROM bookings WHERE user_id = ?', (1,)),
+    "user_by_id": ('SELECT * FROM users WHERE id = ?', (1,)),
+    "user_login": ('SELECT * FROM users WHERE email = ? AND password = ?', ('', '')),
+    "recommendation_by_car": ('SELECT * FROM car_recommendations WHERE car_id = ?', (1,)),
+    "cars_needing_service": ('''
+        SELECT c.* FROM car_recommendations r JOIN cars c ON c.id = r.car_id
+        WHERE r.model_version = ? AND r.recommendation = ?
+    ''', ('', '')),
+    "slot_by_key": ('SELECT * FROM slot_inventory WHERE slot_date = ? AND time_slot = ? AND bay = ?', ('', '', '')),
+    "faq_revision": ('SELECT MAX(revision) FROM faq_entries', ()),
+    "faq_changes_since": ('SELECT * FROM faq_entries WHERE revision > ? ORDER BY revision', (0,)),
+    "chat_messages_before": ('''
+        SELECT id, role, content FROM chat_messages WHERE session_id = ? AND id < ? ORDER BY id DESC LIMIT ?
+    ''', ('', 0, 20)),
+    "booking_counts_by_day": ('''
+        SELECT day, status, SUM(bookings) FROM booking_daily_counts WHERE day BETWEEN ? AND ? GROUP BY day, status
+    ''', ('', '')),
+    "booking_decisions_by_day": ('SELECT * FROM booking_decision_daily WHERE day BETWEEN ? AND ?', ('', '')),
+    "bookings_status_changed_since": ('SELECT * FROM bookings WHERE status_revision > ? ORDER BY status_revision', (0,)),
+    "admin_login": ('SELECT * FROM admins WHERE email = ? AND password = ? AND admin_key = ?', ('', '', '')),
+}
+
+# Registered queries that are meant to scan (e.g. a small lookup table); every other scan is reported
+SCAN_ALLOWED = set()
+
+def explain_query_plan(conn, sql, params=()):
+    """Return the detail column of EXPLAIN QUERY PLAN for a statement."""
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()]
+
+def check_query_plans(conn, queries=None, allowed=SCAN_ALLOWED):
+    """Return {name: plan} for every registered query, outside `allowed`, whose plan contains a scan."""
+    regressions = {}
+    for name, (sql, params) in (queries or PLANNED_QUERIES).items():
+        if name in allowed:
+            continue
+        plan = explain_query_plan(conn, sql, params)
+        # Any "SCAN <table>" visits every row, including "SCAN <table> USING COVERING INDEX ..."
+        # (that only reads the index instead of the table); only SEARCH steps are bounded
+        if any(step.startswith('SCAN ') and step != 'SCAN CONSTANT ROW' for step in plan):
+            regressions[name] = plan
+    return regressions
+
+# Admin dashboard queries: aggregates are read from the booking_daily_counts rollup (one row per
+# day and combination, kept current by triggers) and the booking list is read one page at a time
+def get_booking_status_counts(conn):
+    """Return [(status, count)] for the status chart."""
+    return conn.execute('''
+        SELECT status, SUM(bookings) AS count FROM booking_daily_counts
+        GROUP BY status HAVING SUM(bookings) > 0 ORDER BY count DESC
+    ''').fetchall()
+
+def get_service_type_counts(conn):
+    """Return [(service_type, count)] for the service type chart."""
+    return conn.execute('''
+        SELECT service_type, SUM(bookings) AS count FROM booking_daily_counts
+        GROUP BY service_type HAVING SUM(bookings) > 0 ORDER BY count DESC
+    ''').fetchall()
+
+# Columns of a get_bookings_page() row, in order (migrations add columns to bookings, so never SELECT *)
+BOOKING_PAGE_COLUMNS = ['id', 'user_id', 'car_id', 'service_type', 'appointment_date', 'time_slot', 'status']
+
+def get_bookings_page(conn, before_id=None, limit=25):
+    """
+    Return up to `limit` bookings with id < before_id, newest first (keyset pagination).
+    Pass the id of the last row of one page as before_id to get the next page.
+    """
+    columns = ', '.join(BOOKING_PAGE_COLUMNS)
+    if before_id is None:
+        return conn.execute(f'SELECT {columns} FROM bookings ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+    return conn.execute(f'SELECT {columns} FROM bookings WHERE id < ? ORDER BY id DESC LIMIT ?',
+                        (before_id, limit)).fetchall()
+
+# Booking status changes, applied as one statement per call
+BOOKING_STATUSES = ['Pending', 'Approved', 'Rejected']
+
+@contextmanager
+def _slot_full_as_value_error():
+    # trg_bookings_retake_slot aborts the statement when a rejected booking's slot has no place left
+    try:
+        yield
+    except sqlite3.IntegrityError as e:
+        if 'slot is fully booked' not in str(e):
+            raise
+        raise ValueError("A rejected booking's time slot is fully booked. Raise the slot's capacity "
+                         "or leave that booking out.") from None
+
+def set_booking_status_by_ids(conn, booking_ids, status):
+    """
+    Set the status of the given bookings with one executemany; return the number of rows changed.
+    Raises ValueError if un-rejecting a booking would overbook its slot.
+    """
+    with _slot_full_as_value_error():
+        cursor = conn.executemany('UPDATE bookings SET status = ? WHERE id = ? AND status != ?',
+                                  [(status, booking_id, status) for booking_id in booking_ids])
+    return cursor.rowcount
+
+def set_booking_status_by_filter(conn, status, date_from=None, date_to=None, service_types=None, current_status=None):
+    """
+    Set the status of every booking matching the filters with one set-based UPDATE.
+    A date or service type filter is required (current_status alone would match nearly every
+    booking); returns the number of rows changed. Raises ValueError if un-rejecting a booking
+    would overbook its slot.
+    """
+    if date_from is None and date_to is None and not service_types:
+        raise ValueError("Refusing to update bookings by status alone: choose an appointment date range "
+                         "or a service type.")
+    conditions, params = [], []
+    if date_from is not None:
+        conditions.append('appointment_date >= ?')
+        params.append(str(date_from))
+    if date_to is not None:
+        conditions.append('appointment_date <= ?')
+        params.append(str(date_to))
+    if service_types:
+        conditions.append(f"service_type IN ({', '.join('?' * len(service_types))})")
+        params.extend(service_types)
+    if current_status is not None:
+        conditions.append('status = ?')
+        params.append(current_status)
+
+    with _slot_full_as_value_error():
+        cursor = conn.execute(f"UPDATE bookings SET status = ? WHERE status != ? AND {' AND '.join(conditions)}",
+                              [status, status] + params)
+    return cursor.rowcount
+
 if __name__ == "__main__":
+    import sys
+
     init_db()
+    if sys.argv[1:] == ["check-plans"]:
+        conn = get_db_connection()
+        regressions = check_query_plans(conn)
+        conn.close()
+        for name, plan in regressions.items():
+            print(f"Scan in {name}: {'; '.join(plan)}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,183 @@
+import os
+import sys
+import copy
+import json
+import hashlib
+import argparse
+import joblib
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FAQ_FILE = os.path.join(BASE_DIR, "faq.json")
+INDEX_DIR = os.path.join(BASE_DIR, "..", "models")
+
+# Refit the vocabulary and IDF weights from scratch once this share of the entries has changed
+# since the last fit; until then new questions are vectorized with the fitted vocabulary
+REFIT_FRACTION = float(os.environ.get("CAR_SERVICE_FAQ_REFIT_FRACTION", 0.1))
+
+class FaqIndex:
+    """
+    TF-IDF index over the FAQ questions.
+    Rows of the question matrix are L2-normalized, so a query costs one
+    transform plus one sparse dot product.
+
+    An index is never modified in place. with_changes() returns a new index that shares
+    the fitted vocabulary and the unchanged rows: removed or edited entries are masked
+    out and their new versions are vectorized and appended, so readers holding the old
+    index are never blocked and never see a half-applied change.
+    """
+
+    def __init__(self, faq_data, revision=0):
+        self.faq_data = list(faq_data)
+        self.key = faq_content_key(self.faq_data)
+        self.revision = revision
+        self.vectorizer = None
+        self.matrix = None
+        if self.faq_data:
+            self.vectorizer = TfidfVectorizer()  # norm='l2' by default
+            self.matrix = self.vectorizer.fit_transform([item["question"] for item in self.faq_data]).tocsr()
+        self._reset_changes()
+
+    def _reset_changes(self):
+        # Rows appended since the fit, which rows are live, and where each stored entry id lives
+        self.added = []
+        self.added_matrix = None
+        self.alive = np.ones(len(self.faq_data), dtype=bool)
+        self.positions = {item["id"]: row for row, item in enumerate(self.faq_data) if "id" in item}
+        self.changes_since_fit = 0
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def _row(self, row):
+        return self.faq_data[row] if row < len(self.faq_data) else self.added[row - len(self.faq_data)]
+
+    def items(self):
+        """Live entries, in row order."""
+        return [self._row(row) for row in np.flatnonzero(self.alive)]
+
+    def with_changes(self, changes, revision):
+        """
+        Return a new index with `changes` applied: dicts with id, question, answer and
+        deleted, as returned by faq_store.get_changes(). Only the changed rows are touched.
+        """
+        index = copy.copy(self)
+        index.revision = revision
+        index.alive = self.alive.copy()
+        index.positions = dict(self.positions)
+        index.added = list(self.added)
+        index.changes_since_fit = self.changes_since_fit + len(changes)
+
+        new_items = {}
+        for change in changes:
+            row = index.positions.pop(change["id"], None)
+            if row is not None:
+                index.alive[row] = False
+            new_items.pop(change["id"], None)
+            if not change.get("deleted"):
+                new_items[change["id"]] = {"id": change["id"], "question": change["question"], "answer": change["answer"]}
+
+        live = len(index) + len(new_items)
+        if index.vectorizer is None or index.changes_since_fit >= REFIT_FRACTION * live:
+            return FaqIndex(index.items() + list(new_items.values()), revision)
+
+        if new_items:
+            rows = index.vectorizer.transform([item["question"] for item in new_items.values()]).tocsr()
+            index.added_matrix = rows if index.added_matrix is None else sp.vstack([index.added_matrix, rows]).tocsr()
+            first_row = len(index.faq_data) + len(index.added)
+            for offset, item in enumerate(new_items.values()):
+                index.positions[item["id"]] = first_row + offset
+            index.added.extend(new_items.values())
+            index.alive = np.concatenate([index.alive, np.ones(len(new_items), dtype=bool)])
+        return index
+
+    def search(self, query, k=1):
+        """Return up to k (score, faq_item) pairs, best match first."""
+        if self.matrix is None or not query:
+            return []
+        query_vec = self.vectorizer.transform([query])
+        scores = (self.matrix @ query_vec.T).toarray().ravel()
+        if self.added_matrix is not None:
+            scores = np.concatenate([scores, (self.added_matrix @ query_vec.T).toarray().ravel()])
+        live_rows = np.flatnonzero(self.alive)
+        scores = scores[live_rows]
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        if k == len(scores):
+            top = np.argsort(-scores, kind="stable")
+        else:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), self._row(live_rows[i])) for i in top[:k]]
+
+    def best_answer(self, query, threshold=0.3):
+        """Return the answer of the best matching question, or None below the threshold."""
+        results = self.search(query, k=1)
+        if results and results[0][0] > threshold:
+            return results[0][1]["answer"]
+        return None
+
+    def save(self, path=None):
+        """Persist the fitted index; only call this on a freshly built one (no pending changes)."""
+        path = path or index_path(self.key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        # Store plain components rather than the instance so the file does not depend on the module name
+        joblib.dump({"faq_data": self.faq_data, "vectorizer": self.vectorizer, "matrix": self.matrix}, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        state = joblib.load(path)
+        index = cls.__new__(cls)
+        index.faq_data = state["faq_data"]
+        index.key = faq_content_key(index.faq_data)
+        index.vectorizer = state["vectorizer"]
+        index.matrix = state["matrix"]
+        index.revision = 0
+        index._reset_changes()
+        return index
+
+    @classmethod
+    def load_or_build(cls, faq_data, revision=0):
+        """Reuse the persisted index for this FAQ content, building and saving it if missing."""
+        path = index_path(faq_content_key(faq_data))
+        if os.path.exists(path):
+            index = cls.load(path)
+            index.revision = revision
+            return index
+        index = cls(faq_data, revision)
+        if index.faq_data:
+            index.save(path)
+        return index
+
+def faq_content_key(faq_data):
+    return hashlib.sha256(json.dumps(faq_data, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def index_path(key):
+    return os.path.join(INDEX_DIR, f"faq_index-{key}.joblib")
+
+# Rebuild the index offline: python faq_index.py build
+def main(argv=None):
+    from database import init_db
+    from faq_store import load_entries
+
+    parser = argparse.ArgumentParser(description="Build the FAQ retrieval index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Fit and store the index for the FAQ table")
+    build_parser.add_argument("--faq", default=FAQ_FILE, help="faq.json used to seed an empty FAQ table")
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        init_db()
+        entries, revision = load_entries(seed_path=args.faq)
+        index = FaqIndex(entries, revision)
+        print(f"Indexed {len(index)} questions at revision {revision}: {index.save()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
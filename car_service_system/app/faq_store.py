@@ -0,0 +1,156 @@
+"""
+Managed FAQ knowledge base.
+
+Entries live in the faq_entries table, seeded from faq.json the first time, and are edited
+from the Admin Dashboard. Every write stamps the entry with the next revision, so a
+LiveFaqIndex only has to fetch and apply the entries changed since the revision it has.
+
+    python faq_store.py import faq.json   # add new questions and update changed answers from a file
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from database import get_db_connection, db_connection, init_db
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FAQ_FILE = os.path.join(BASE_DIR, "faq.json")
+
+# How often readers look for FAQ changes made by other processes
+FAQ_REFRESH_SECONDS = float(os.environ.get("CAR_SERVICE_FAQ_REFRESH_SECONDS", 5))
+
+_NEXT_REVISION = '(SELECT COALESCE(MAX(revision), 0) + 1 FROM faq_entries)'
+
+def seed_from_json(conn, path=FAQ_FILE):
+    """Fill an empty FAQ table from faq.json; return the number of entries added."""
+    if conn.execute('SELECT 1 FROM faq_entries LIMIT 1').fetchone() is not None:
+        return 0
+    with open(path, "r", encoding="utf-8") as file:
+        faq_data = json.load(file)
+    conn.executemany('INSERT INTO faq_entries (question, answer, revision) VALUES (?, ?, 1)',
+                     [(item["question"], item["answer"]) for item in faq_data])
+    return len(faq_data)
+
+def add_entry(conn, question, answer):
+    cursor = conn.execute(f'INSERT INTO faq_entries (question, answer, revision) VALUES (?, ?, {_NEXT_REVISION})',
+                          (question, answer))
+    return cursor.lastrowid
+
+def update_entry(conn, entry_id, question, answer):
+    cursor = conn.execute(f'''
+        UPDATE faq_entries SET question = ?, answer = ?, revision = {_NEXT_REVISION}, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ? AND deleted = 0
+    ''', (question, answer, entry_id))
+    return cursor.rowcount
+
+def delete_entry(conn, entry_id):
+    cursor = conn.execute(f'''
+        UPDATE faq_entries SET deleted = 1, revision = {_NEXT_REVISION}, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ? AND deleted = 0
+    ''', (entry_id,))
+    return cursor.rowcount
+
+def get_changes(conn, since_revision):
+    """Every entry written after `since_revision`, in its latest state (deleted ones included)."""
+    return [dict(row) for row in conn.execute(
+        'SELECT id, question, answer, deleted, revision FROM faq_entries WHERE revision > ? ORDER BY revision',
+        (since_revision,)).fetchall()]
+
+def search_entries(conn, text="", limit=50):
+    """Live entries whose question or answer contains `text`, for the admin editor."""
+    return conn.execute('''
+        SELECT id, question, answer, updated_at FROM faq_entries
+        WHERE deleted = 0 AND (question LIKE ? OR answer LIKE ?)
+        ORDER BY id LIMIT ?
+    ''', (f"%{text}%", f"%{text}%", limit)).fetchall()
+
+def load_entries(seed_path=FAQ_FILE):
+    """Return (live entries, revision), seeding the table from `seed_path` if it is empty."""
+    with db_connection() as conn:
+        # Take the write lock first so two processes starting together cannot both seed
+        conn.execute('BEGIN IMMEDIATE')
+        seed_from_json(conn, seed_path)
+        entries = [dict(row) for row in conn.execute(
+            'SELECT id, question, answer FROM faq_entries WHERE deleted = 0 ORDER BY id').fetchall()]
+        revision = conn.execute('SELECT COALESCE(MAX(revision), 0) FROM faq_entries').fetchone()[0]
+    return entries, revision
+
+def import_json(conn, path):
+    """Add questions from a faq.json-style file that are not in the table and update changed answers."""
+    with open(path, "r", encoding="utf-8") as file:
+        faq_data = json.load(file)
+    existing = {row["question"]: row for row in conn.execute(
+        'SELECT id, question, answer FROM faq_entries WHERE deleted = 0').fetchall()}
+    added = updated = 0
+    for item in faq_data:
+        row = existing.get(item["question"])
+        if row is None:
+            add_entry(conn, item["question"], item["answer"])
+            added += 1
+        elif row["answer"] != item["answer"]:
+            update_entry(conn, row["id"], item["question"], item["answer"])
+            updated += 1
+    return added, updated
+
+class LiveFaqIndex:
+    """
+    Holds the current FaqIndex and keeps it in step with the FAQ table.
+    current() never waits: it returns the index it has and, at most every refresh_seconds,
+    applies the latest changes in a background thread. The new index replaces the old one
+    in a single assignment, so in-flight searches finish on the version they started with.
+    """
+
+    def __init__(self, index, refresh_seconds=FAQ_REFRESH_SECONDS):
+        self._index = index
+        self.refresh_seconds = refresh_seconds
+        self._checked_at = time.monotonic()
+        self._refresh_lock = threading.Lock()
+
+    @classmethod
+    def build(cls, seed_path=FAQ_FILE):
+        from faq_index import FaqIndex
+
+        entries, revision = load_entries(seed_path)
+        return cls(FaqIndex.load_or_build(entries, revision))
+
+    @property
+    def revision(self):
+        return self._index.revision
+
+    def current(self):
+        if time.monotonic() - self._checked_at >= self.refresh_seconds and not self._refresh_lock.locked():
+            self._checked_at = time.monotonic()
+            threading.Thread(target=self.refresh, name="faq-refresh", daemon=True).start()
+        return self._index
+
+    def refresh(self):
+        """Apply the changes since the current revision and return the resulting index."""
+        with self._refresh_lock:
+            conn = get_db_connection()
+            try:
+                changes = get_changes(conn, self._index.revision)
+            finally:
+                conn.close()
+            if changes:
+                self._index = self._index.with_changes(changes, max(change["revision"] for change in changes))
+            self._checked_at = time.monotonic()
+            return self._index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the FAQ knowledge base.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Add new and update changed entries from a JSON file")
+    import_parser.add_argument("path", nargs="?", default=FAQ_FILE, help="faq.json-style file")
+
+    args = parser.parse_args(argv)
+    init_db()
+    if args.command == "import":
+        with db_connection() as conn:
+            added, updated = import_json(conn, args.path)
+        print(f"Added {added} and updated {updated} FAQ entries")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Pandas-free fast path for single-car recommendations.
+
+The fitted tree (or forest of trees) is exported once into flat lists, categorical
+features are encoded with plain dict lookups, and a prediction is a short walk from
+the root to a leaf. There is no DataFrame and no sklearn input validation on the hot path.
+
+    python fast_inference.py verify   # compare against sklearn on the full training set
+"""
+import sys
+import time
+import numpy as np
+from ai_model import recommend_services
+
+FEATURES = ['mileage', 'year', 'driving_condition']
+
+class CompiledRecommender:
+    """Flat-array export of a fitted DecisionTreeClassifier or tree ensemble."""
+
+    def __init__(self, model, label_encoders, features=FEATURES):
+        if hasattr(model, "tree_"):
+            trees, self.is_ensemble = [model], False
+        elif hasattr(model, "estimators_") and all(
+                hasattr(tree, "tree_") and hasattr(tree, "classes_") for tree in np.ravel(model.estimators_)):
+            # Forests average the per-tree class distributions, like RandomForestClassifier.predict_proba
+            trees, self.is_ensemble = list(np.ravel(model.estimators_)), True
+        else:
+            raise ValueError(f"{type(model).__name__} cannot be compiled; use recommend_services().")
+        if not hasattr(model, "classes_"):
+            raise ValueError(f"{type(model).__name__} is not a classifier.")
+
+        self.model = model
+        self.features = list(features)
+        self.trees = []
+        for tree in trees:
+            t = tree.tree_
+            value = t.value[:, 0, :]
+            self.trees.append({
+                "left": t.children_left.tolist(),
+                "right": t.children_right.tolist(),
+                "feature": t.feature.tolist(),
+                "threshold": t.threshold.tolist(),
+                "leaf_class": value.argmax(axis=1).tolist(),
+                "leaf_proba": (value / value.sum(axis=1, keepdims=True)).tolist() if self.is_ensemble else None,
+            })
+
+        # Categorical features: value -> code, with -1 for unseen values as in recommend_services()
+        self.encoders = {col: {value: code for code, value in enumerate(label_encoders[col].classes_)}
+                         for col in self.features if col in label_encoders}
+        # Class index -> maintenance label string
+        self.labels = label_encoders['maintenance_labels'].classes_[np.asarray(model.classes_)].tolist()
+
+    def encode(self, car_details):
+        row = []
+        for feature in self.features:
+            if feature not in car_details:
+                raise ValueError(f"Missing required feature: {feature}")
+            value = car_details[feature]
+            if value is None or value != value:
+                raise ValueError(f"Invalid value for feature: {feature}")
+            if feature in self.encoders:
+                value = self.encoders[feature].get(value, -1)
+            # sklearn compares float32 inputs against the thresholds; round the same way
+            row.append(float(np.float32(value)))
+        return row
+
+    def _leaf(self, tree, row):
+        left, right, feature, threshold = tree["left"], tree["right"], tree["feature"], tree["threshold"]
+        node = 0
+        while left[node] != -1:
+            node = left[node] if row[feature[node]] <= threshold[node] else right[node]
+        return node
+
+    def recommend(self, car_details):
+        """Same result as recommend_services(model, label_encoders, car_details)."""
+        row = self.encode(car_details)
+        if not self.is_ensemble:
+            tree = self.trees[0]
+            return self.labels[tree["leaf_class"][self._leaf(tree, row)]]
+        totals = [0.0] * len(self.labels)
+        for tree in self.trees:
+            for index, p in enumerate(tree["leaf_proba"][self._leaf(tree, row)]):
+                totals[index] += p
+        return self.labels[totals.index(max(totals))]
+
+    def predict_encoded(self, X):
+        """Vectorized traversal of already encoded rows; returns class indices."""
+        X = np.asarray(X, dtype=np.float32)
+        totals = None
+        for tree in self.trees:
+            left, right = np.asarray(tree["left"]), np.asarray(tree["right"])
+            feature, threshold = np.asarray(tree["feature"]), np.asarray(tree["threshold"])
+            node = np.zeros(len(X), dtype=np.intp)
+            active = left[node] != -1
+            while active.any():
+                idx = np.flatnonzero(active)
+                current = node[idx]
+                go_left = X[idx, feature[current]] <= threshold[current]
+                node[idx] = np.where(go_left, left[current], right[current])
+                active[idx] = left[node[idx]] != -1
+            if not self.is_ensemble:
+                return np.asarray(tree["leaf_class"])[node]
+            proba = np.asarray(tree["leaf_proba"])[node]
+            totals = proba if totals is None else totals + proba
+        return totals.argmax(axis=1)
+
+    def verify(self, X):
+        """Return the number of rows of encoded X where this engine disagrees with model.predict()."""
+        expected = np.searchsorted(self.model.classes_, self.model.predict(X))
+        return int((self.predict_encoded(X) != expected).sum())
+
+# Compiled engines for the most recently used models (a new model artifact compiles a new engine)
+_compiled = []
+_MAX_COMPILED = 4
+
+def compile_model(model, label_encoders):
+    for cached_model, cached_encoders, engine in _compiled:
+        if cached_model is model and cached_encoders is label_encoders:
+            return engine
+    engine = CompiledRecommender(model, label_encoders)
+    _compiled.insert(0, (model, label_encoders, engine))
+    del _compiled[_MAX_COMPILED:]
+    return engine
+
+def recommend_services_fast(model, label_encoders, car_details):
+    """Drop-in replacement for recommend_services() that uses the compiled engine when the model supports it."""
+    try:
+        engine = compile_model(model, label_encoders)
+    except ValueError:
+        return recommend_services(model, label_encoders, car_details)
+    return engine.recommend(car_details)
+
+def main(argv=None):
+    from ai_model import get_model, load_training_data, TRAINING_CONFIG, DATA_PATH
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv != ["verify"]:
+        print("usage: python fast_inference.py verify")
+        return 2
+
+    model, label_encoders = get_model()
+    engine = CompiledRecommender(model, label_encoders)
+    X, _, _ = load_training_data(DATA_PATH, TRAINING_CONFIG)
+    mismatches = engine.verify(X)
+    print(f"{mismatches} mismatches on {len(X)} training rows")
+
+    car = {"mileage": float(X.iloc[0]["mileage"]), "year": float(X.iloc[0]["year"]),
+           "driving_condition": label_encoders["driving_condition"].classes_[int(X.iloc[0]["driving_condition"])]}
+    for name, fn in (("sklearn", lambda: recommend_services(model, label_encoders, car)),
+                     ("compiled", lambda: engine.recommend(car))):
+        start = time.perf_counter()
+        for _ in range(1000):
+            fn()
+        print(f"{name:8s} {(time.perf_counter() - start) * 1e3:.1f} us per car")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import threading
+import urllib.error
+import urllib.request
+from instrumentation import timed
+
+# Inference server settings (overridable through the environment); no URL means predict locally
+INFERENCE_URL = os.environ.get("CAR_SERVICE_INFERENCE_URL")
+INFERENCE_TIMEOUT = float(os.environ.get("CAR_SERVICE_INFERENCE_TIMEOUT", 2))
+# After a failed call, predict locally for this long before trying the server again
+INFERENCE_RETRY_SECONDS = float(os.environ.get("CAR_SERVICE_INFERENCE_RETRY_SECONDS", 30))
+
+def load_local_model():
+    """(model, label_encoders) for in-process predictions. ai_model (pandas, sklearn) is only imported here."""
+    from ai_model import get_model
+    return get_model()
+
+class InferenceClient:
+    """
+    Recommendations from the shared inference server, falling back to a model loaded in
+    this process when no server is configured or the server cannot be reached.
+    The local model is only loaded the first time the fallback is needed.
+    """
+
+    def __init__(self, url=INFERENCE_URL, timeout=INFERENCE_TIMEOUT, retry_seconds=INFERENCE_RETRY_SECONDS):
+        self.url = url.rstrip("/") if url else None
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self._down_until = 0.0
+        self._remote_version = None
+        self._lock = threading.Lock()
+        self.remote_calls = 0
+        self.local_calls = 0
+        self.failures = 0
+
+    def _remote_available(self):
+        return self.url is not None and time.monotonic() >= self._down_until
+
+    def _mark_down(self):
+        with self._lock:
+            self._down_until = time.monotonic() + self.retry_seconds
+            self.failures += 1
+
+    def _request(self, path, payload=None):
+        data = json.dumps(payload, default=float).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 400:
+                # The input is invalid, which the local model would reject as well
+                raise ValueError(json.loads(e.read() or b"{}").get("error", "Invalid request")) from None
+            raise
+
+    @timed("inference.recommend")
+    def recommend(self, car_details):
+        """Same result as recommend_services() for one car."""
+        if self._remote_available():
+            try:
+                response = self._request("/recommend", {"cars": [car_details]})
+                self._remote_version = response["model_version"]
+                self.remote_calls += 1
+                return response["recommendations"][0]
+            except (OSError, KeyError, json.JSONDecodeError):
+                self._mark_down()
+        from prediction_cache import cached_recommend
+
+        model, label_encoders = load_local_model()
+        self.local_calls += 1
+        return cached_recommend(model, label_encoders, car_details)
+
+    def model_version(self):
+        """Artifact key of the model that recommend() is currently answering with."""
+        if self._remote_available():
+            if self._remote_version is not None:
+                return self._remote_version
+            try:
+                self._remote_version = self._request("/health")["model_version"]
+                return self._remote_version
+            except (OSError, KeyError, json.JSONDecodeError):
+                self._mark_down()
+        from ai_model import get_model_version
+
+        load_local_model()
+        return get_model_version()
+
+    def stats(self):
+        return {"url": self.url, "remote_calls": self.remote_calls, "local_calls": self.local_calls,
+                "failures": self.failures, "server_up": self._remote_available()}
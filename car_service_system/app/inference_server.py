@@ -0,0 +1,229 @@
+"""
+Shared inference server for service recommendations.
+
+One process holds the model and answers HTTP requests from any number of app workers.
+Concurrent requests are gathered into micro-batches: the first request opens a window of
+--batch-window-ms, everything that arrives inside it (up to --max-batch cars) is predicted
+with one vectorized call, and each request gets its own slice of the result back.
+
+    python inference_server.py --port 8765 --batch-window-ms 5 --max-batch 256
+
+    POST /recommend  {"cars": [{"mileage": 42000, "year": 2018, "driving_condition": "Good"}]}
+                  -> {"recommendations": ["Oil Change"], "model_version": "..."}
+    GET  /health  -> {"status": "ok", "model_version": "...", "metrics": {...}}
+
+Restart the server after building or promoting a new model.
+"""
+import sys
+import json
+import math
+import time
+import queue
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+from ai_model import DATA_PATH, get_model, get_model_version, recommend_services_batch
+
+FEATURES = ['mileage', 'year', 'driving_condition']
+# Accepted ranges for the numeric features (the Add Car form allows years from 1900)
+NUMERIC_RANGES = {'mileage': (0, math.inf), 'year': (1900, 2100)}
+
+def validate_car(car):
+    """
+    Check one car's features at the edge (presence, type and range), so a malformed request
+    gets a 400 instead of reaching the batched predict call.
+    """
+    if not isinstance(car, dict):
+        raise ValueError("Each car must be an object")
+    for feature in FEATURES:
+        if feature not in car:
+            raise ValueError(f"Missing required feature: {feature}")
+        value = car[feature]
+        if feature in NUMERIC_RANGES:
+            low, high = NUMERIC_RANGES[feature]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise ValueError(f"Invalid value for feature: {feature} (expected a number)")
+            if not low <= value <= high:
+                bounds = f"at least {low}" if high == math.inf else f"between {low} and {high}"
+                raise ValueError(f"Invalid value for feature: {feature} (must be {bounds})")
+        elif not isinstance(value, str):
+            raise ValueError(f"Invalid value for feature: {feature} (expected a string)")
+
+class _Pending:
+    def __init__(self, cars):
+        self.cars = cars
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+class MicroBatcher:
+    """
+    Collects submitted cars for up to `window_s` and predicts them with one predict(cars) call.
+    If that call fails, each request in the batch is predicted on its own, so a request the
+    validation did not catch fails alone instead of failing every request batched with it.
+    """
+
+    def __init__(self, predict, window_s=0.005, max_batch=256):
+        self.predict = predict
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self.predict_seconds = 0.0
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, cars, timeout=30):
+        """Return the labels for `cars` once the batch containing them has been predicted."""
+        pending = _Pending(cars)
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError(f"No prediction within {timeout}s")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0].cars)
+        deadline = time.monotonic() + self.window_s
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            size += len(pending.cars)
+        return batch, size
+
+    def _run(self):
+        while True:
+            batch, size = self._collect()
+            start = time.perf_counter()
+            try:
+                labels = self.predict([car for pending in batch for car in pending.cars])
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0].error = e
+                    batch[0].done.set()
+                else:
+                    self._predict_each(batch)
+                continue
+            elapsed = time.perf_counter() - start
+
+            offset = 0
+            for pending in batch:
+                pending.result = labels[offset:offset + len(pending.cars)]
+                offset += len(pending.cars)
+                pending.done.set()
+            with self._lock:
+                self.batches += 1
+                self.requests += len(batch)
+                self.rows += size
+                self.predict_seconds += elapsed
+
+    def _predict_each(self, batch):
+        for pending in batch:
+            try:
+                pending.result = self.predict(pending.cars)
+            except Exception as e:
+                pending.error = e
+            pending.done.set()
+
+    def metrics(self):
+        with self._lock:
+            return {"batches": self.batches, "requests": self.requests, "rows": self.rows,
+                    "mean_batch_rows": self.rows / self.batches if self.batches else 0.0,
+                    "mean_predict_ms": self.predict_seconds * 1e3 / self.batches if self.batches else 0.0,
+                    "queued": self._queue.qsize()}
+
+def make_predict(model, label_encoders):
+    def predict(cars):
+        frame = pd.DataFrame(cars, columns=FEATURES)
+        return [str(label) for labels in recommend_services_batch(model, label_encoders, frame, chunk_size=None)
+                for label in labels]
+    return predict
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    batcher = None
+    model_version = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "Not found"})
+            return
+        self._send_json(200, {"status": "ok", "model_version": self.model_version, "metrics": self.batcher.metrics()})
+
+    def do_POST(self):
+        if self.path != "/recommend":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            cars = json.loads(self.rfile.read(length) or b"{}").get("cars")
+            if not isinstance(cars, list) or not cars:
+                raise ValueError("Expected a non-empty 'cars' list")
+            for car in cars:
+                validate_car(car)
+        except (ValueError, AttributeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        try:
+            labels = self.batcher.submit(cars)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, {"recommendations": labels, "model_version": self.model_version})
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate the cost of a sub-millisecond prediction
+        pass
+
+def make_server(host, port, model, label_encoders, model_version, window_s=0.005, max_batch=256):
+    handler = type("BoundInferenceHandler", (InferenceHandler,), {
+        "batcher": MicroBatcher(make_predict(model, label_encoders), window_s, max_batch),
+        "model_version": model_version,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve service recommendations with micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--data", default=DATA_PATH, help="Path to car_maintenance.csv")
+    parser.add_argument("--batch-window-ms", type=float, default=5, help="How long the first request waits for others")
+    parser.add_argument("--max-batch", type=int, default=256, help="Maximum cars per predict call")
+    args = parser.parse_args(argv)
+
+    model, label_encoders = get_model(args.data)
+    model_version = get_model_version(args.data)
+    server = make_server(args.host, args.port, model, label_encoders, model_version,
+                         args.batch_window_ms / 1000, args.max_batch)
+    print(f"Serving model {model_version} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
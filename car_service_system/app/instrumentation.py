@@ -0,0 +1,196 @@
+"""
+Lightweight spans and timers for finding out where a page rerun spends its time.
+
+    with span("render.charts"):
+        ...
+
+    @timed("model.train_model")
+    def train_model(...): ...
+
+Every finished span is added to a process-wide histogram per span name and, when the
+current thread is running a traced rerun (with trace(...), or start_trace() ... finish_trace()),
+to that rerun's breakdown. Finished traces are kept in memory for the admin debug panel
+and can be exported as JSON lines and in the Prometheus text format.
+"""
+import io
+import os
+import json
+import time
+import pstats
+import cProfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# Instrumentation settings (overridable through the environment)
+INSTRUMENTATION_ENABLED = os.environ.get("CAR_SERVICE_INSTRUMENTATION", "1") == "1"
+TRACE_HISTORY = int(os.environ.get("CAR_SERVICE_TRACE_HISTORY", 50))
+# Append every finished trace to this file as one JSON line
+METRICS_JSONL_PATH = os.environ.get("CAR_SERVICE_METRICS_JSONL")
+# Rewrite this file in the Prometheus text format after every trace (e.g. for a textfile collector)
+METRICS_PROM_PATH = os.environ.get("CAR_SERVICE_METRICS_PROM")
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Trace:
+    """Breakdown of one rerun: its spans in start order, plus an optional profile."""
+
+    def __init__(self, name, profiler=None):
+        self.name = name
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.profiler = profiler
+        self.profile = None
+
+    def as_dict(self, include_profile=False):
+        record = {
+            "name": self.name,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "duration_ms": self.duration * 1e3 if self.duration is not None else None,
+            "spans": sorted(self.spans, key=lambda item: item["start_ms"]),
+        }
+        if include_profile:
+            record["profile"] = self.profile
+        return record
+
+_local = threading.local()
+_traces = deque(maxlen=TRACE_HISTORY)
+_histograms = {}
+_metrics_lock = threading.Lock()
+
+def _observe(name, seconds):
+    with _metrics_lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = {"count": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS)}
+        histogram["count"] += 1
+        histogram["sum"] += seconds
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][index] += 1
+
+def record(name, seconds, detail=None):
+    """Record a span that has already finished, e.g. a query timed by the database layer."""
+    if not INSTRUMENTATION_ENABLED:
+        return
+    _observe(name, seconds)
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.spans.append({
+            "name": name,
+            "depth": len(getattr(_local, "stack", ())),
+            "start_ms": (time.perf_counter() - seconds - trace.start) * 1e3,
+            "duration_ms": seconds * 1e3,
+            "detail": detail,
+        })
+
+@contextmanager
+def span(name, detail=None):
+    """Time the enclosed block as `name`; spans opened inside it are nested under it."""
+    if not INSTRUMENTATION_ENABLED:
+        yield
+        return
+    stack = _local.__dict__.setdefault("stack", [])
+    stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        record(name, elapsed, detail)
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record_query(sql, elapsed):
+    """database.add_query_hook() callback: every statement becomes a db.query span."""
+    record("db.query", elapsed, " ".join(sql.split())[:120])
+
+# Per-rerun traces
+def start_trace(name, profile=False):
+    """Start tracing this thread's rerun; profile=True also captures a cProfile for it."""
+    if not INSTRUMENTATION_ENABLED:
+        return None
+    profiler = None
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    _local.stack = []
+    _local.trace = Trace(name, profiler)
+    return _local.trace
+
+def rename_trace(name):
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.name = name
+
+def finish_trace():
+    """Close this thread's trace, keep it for the debug panel and export it."""
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return None
+    _local.trace = None
+    trace.duration = time.perf_counter() - trace.start
+    if trace.profiler is not None:
+        trace.profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(trace.profiler, stream=output).sort_stats("cumulative").print_stats(40)
+        trace.profile = output.getvalue()
+        trace.profiler = None
+    _observe(trace.name, trace.duration)
+    _traces.append(trace)
+
+    if METRICS_JSONL_PATH:
+        with open(METRICS_JSONL_PATH, "a", encoding="utf-8") as file:
+            file.write(json.dumps(trace.as_dict()) + "\n")
+    if METRICS_PROM_PATH:
+        temp_path = METRICS_PROM_PATH + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(prometheus_text())
+        os.replace(temp_path, METRICS_PROM_PATH)
+    return trace
+
+@contextmanager
+def trace(name, profile=False):
+    """Trace the enclosed block as one rerun; the trace is finished however the block exits."""
+    start_trace(name, profile)
+    try:
+        yield
+    finally:
+        finish_trace()
+
+def recent_traces():
+    """Finished traces, newest first."""
+    return list(reversed(_traces))
+
+# Exports
+def prometheus_text():
+    lines = ["# HELP car_service_span_seconds Duration of instrumented spans and page reruns.",
+             "# TYPE car_service_span_seconds histogram"]
+    with _metrics_lock:
+        histograms = {name: dict(histogram, buckets=list(histogram["buckets"]))
+                      for name, histogram in _histograms.items()}
+    for name in sorted(histograms):
+        histogram = histograms[name]
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        for bound, count in zip(BUCKETS, histogram["buckets"]):
+            lines.append(f'car_service_span_seconds_bucket{{span="{label}",le="{bound}"}} {count}')
+        lines.append(f'car_service_span_seconds_bucket{{span="{label}",le="+Inf"}} {histogram["count"]}')
+        lines.append(f'car_service_span_seconds_sum{{span="{label}"}} {histogram["sum"]:.6f}')
+        lines.append(f'car_service_span_seconds_count{{span="{label}"}} {histogram["count"]}')
+    return "\n".join(lines) + "\n"
+
+def traces_jsonl():
+    return "".join(json.dumps(trace.as_dict()) + "\n" for trace in list(_traces))
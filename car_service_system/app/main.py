@@ -1,61 +1,104 @@
 import os
-from datetime import date
-import pandas as pd
+from datetime import date, timedelta
 import sqlite3
 import streamlit as st
 from datetime import datetime
-from database import get_db_connection, init_db
-from ai_model import train_model, recommend_services
-import json
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import base64
-import plotly.express as px
+from instrumentation import (span, timed, trace, record_query, recent_traces, prometheus_text,
+                             traces_jsonl)
+from database import (get_db_connection, db_connection, init_db, get_booking_status_counts, get_service_type_counts,
+                      get_bookings_page, BOOKING_PAGE_COLUMNS, set_booking_status_by_ids, set_booking_status_by_filter,
+                      SLOT_CAPACITY, add_query_hook)
+from inference_client import InferenceClient, INFERENCE_URL, load_local_model
+from slots import TIME_SLOTS, reserve_slot, set_slot_capacity, get_slot_availability, next_free_slots
+from user_data import get_user, get_user_cars, get_user_bookings, invalidate_user, invalidate_all
+from recommendations import upsert_recommendation, recommend_for_car, get_recommendation_counts, cars_needing
+from media import media_url
+from notifications import email_enabled, enqueue_email, start_worker
+from warmup import warm, warmed, warmup_status
+from chat_history import ChatHistory, CHAT_WINDOW
+from rollups import get_booking_trend, get_approval_latency
+# pandas, plotly and the model/FAQ libraries (sklearn) are imported only by the pages that use them
+
+
+# Time every database query once per process
+@st.cache_resource
+def install_query_timing():
+    add_query_hook(record_query)
+
+install_query_timing()
 
+# Initialize Database once per process
+@st.cache_resource
+def initialize_database():
+    with span("db.init_db"):
+        init_db()
 
-# Initialize Database
-init_db()
+initialize_database()
+
+# Recommendations come from the shared inference server when CAR_SERVICE_INFERENCE_URL is set;
+# otherwise (or if it is down) the model is loaded in this process, trained once per dataset version
+@st.cache_resource
+def get_inference_client():
+    return InferenceClient()
 
-# Train AI Model
-model, label_encoders = train_model()
+inference = get_inference_client()
+
+# Start the email outbox worker once per process
+@st.cache_resource
+def start_email_worker():
+    return start_worker()
+
+# Start it with the app, so mail queued before a restart is sent without waiting for the next booking
+if email_enabled():
+    start_email_worker()
 
 # Correct the path to faq.json inside the app directory
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Get the current directory
 FAQ_FILE = os.path.join(BASE_DIR, "faq.json")  # Ensure correct path
 
-# Load FAQ data once using caching to improve performance
-@st.cache_resource
-def load_faq_data():
+# Build the FAQ retrieval index over the FAQ table (seeded from faq.json when empty); runs in the warm-up thread
+def build_faq_index():
     """
-    Loads predefined FAQ data from a JSON file.
+    Loads the FAQ entries and returns a live index that follows later edits.
     """
+    from faq_store import LiveFaqIndex
+
+    return LiveFaqIndex.build(FAQ_FILE)
+
+# Load the FAQ index once per process, waiting for the warm-up thread if it is still building it
+@st.cache_resource
+def load_faq_index():
     try:
-        with open(FAQ_FILE, "r", encoding="utf-8") as file:
-            return json.load(file)
+        return warmed("faq_index", build_faq_index)
     except Exception as e:
+        from faq_index import FaqIndex
+        from faq_store import LiveFaqIndex
+
         st.error(f"❌ Failed to load FAQ data: {e}")
-        return []
+        return LiveFaqIndex(FaqIndex([]))
+
+# Load the model and the FAQ index in the background so the first page renders without waiting for them.
+# With an inference server the local model is only a fallback and is not preloaded.
+@st.cache_resource
+def start_warmup():
+    warm("faq_index", build_faq_index)
+    if INFERENCE_URL is None:
+        warm("model", load_local_model)
+
+start_warmup()
 
 # Function to find the best response using similarity search
-def get_best_response(user_input, faq_data):
+@timed("chatbot.get_best_response")
+def get_best_response(user_input, faq_index):
     """
-    Finds the most similar question from the FAQ data and returns the answer.
+    Finds the most similar question from the FAQ index and returns the answer.
     """
-    if not faq_data:
+    if not len(faq_index):
         return "I'm sorry, I don't have any answers available at the moment."
 
-    questions = [item["question"] for item in faq_data]
-
-    # Compute TF-IDF similarity
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform(questions + [user_input])
-    similarities = cosine_similarity(tfidf_matrix[-1], tfidf_matrix[:-1])  # Compare user input with predefined questions
-
-    best_match_idx = similarities.argmax()  # Get index of best match
-    best_match_score = similarities[0, best_match_idx]  # Get similarity score
-
-    if best_match_score > 0.3:  # Set a threshold for relevant matches
-        return faq_data[best_match_idx]["answer"]
+    answer = faq_index.best_answer(user_input, threshold=0.3)  # Set a threshold for relevant matches
+    if answer is not None:
+        return answer
     else:
         return "I'm sorry, I don't understand that question. Please try asking something else."
 
@@ -64,23 +107,29 @@ def chatbot_interface():
     st.title("🚗 Car Service Chatbot")
     st.write("Ask me anything about car services or mechanics!")
 
+    # Recent messages stay in memory (bounded); the full conversation is in chat_messages
     if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
-
-    # Load FAQ data
-    faq_data = load_faq_data()
-
-    # Display chat history
-    for message in st.session_state.chat_history:
+        st.session_state.chat_history = ChatHistory(user_id=st.session_state.user_id)
+        st.session_state.chat_window = CHAT_WINDOW
+    chat_history = st.session_state.chat_history
+
+    # Load FAQ index (the latest version; edits are picked up in the background)
+    faq_index = load_faq_index().current()
+
+    # Display only the newest messages; older ones are loaded on request
+    if len(chat_history) > st.session_state.chat_window:
+        if st.button("⬆️ Load earlier messages"):
+            st.session_state.chat_window += CHAT_WINDOW
+    for message in chat_history.window(st.session_state.chat_window):
         with st.chat_message(message["role"]):
             st.write(message["content"])
 
     # Get user input
     user_input = st.chat_input("Ask a question...")
     if user_input:
-        st.session_state.chat_history.append({"role": "user", "content": user_input})
-        chatbot_response = get_best_response(user_input, faq_data)
-        st.session_state.chat_history.append({"role": "assistant", "content": chatbot_response})
+        chat_history.append("user", user_input)
+        chatbot_response = get_best_response(user_input, faq_index)
+        chat_history.append("assistant", chatbot_response)
 
         # Display latest messages
         with st.chat_message("user"):
@@ -88,6 +137,12 @@ def chatbot_interface():
         with st.chat_message("assistant"):
             st.write(chatbot_response)
 
+# Services offered on the Book Service page
+SERVICE_TYPES = ["Oil Change", "Tire Rotation", "Battery Check", "Brake Inspection"]
+
+# Page sizes offered on the Admin Dashboard booking list
+ADMIN_PAGE_SIZES = [10, 25, 50, 100]
+
 # Streamlit App
 st.set_page_config(page_title="AutoMate", page_icon="🚗", layout="wide")
 
@@ -176,555 +231,764 @@ if st.session_state.user_id or st.session_state.is_admin:
     if st.sidebar.button("Logout"):
         st.session_state.user_id = None
         st.session_state.is_admin = False
+        st.session_state.pop("chat_history", None)  # start the next user's chat afresh
         st.success("✅ Logged out successfully!")
         st.rerun()  # Refresh the page to reflect the logout
 
 
 import os
-import base64
 import streamlit as st
 
-# Function to find and load the video
+# Function to find the video and return a URL for it
 def load_video(video_name):
-    # Get the base directory of the script
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Construct the path to the video
-    video_path = os.path.join(base_dir, "videos", video_name)
-    
-    # Check if the video exists
-    if not os.path.exists(video_path):
-        raise FileNotFoundError(f"Video not found at {video_path}")
-    
-    return video_path
-
-# Home Page
-if menu == "Home":
-    try:
-        # Load the video dynamically
-        video_path = load_video("hero.mp4")
+    # Served from static/ by URL when possible, otherwise as a data URI encoded once per process
+    return media_url(video_name)
+
+# Page content for the selected menu entry
+def render_page(menu):
+    # Home Page
+    if menu == "Home":
+        try:
+            # Load the video dynamically
+            video_url = load_video("hero.mp4")
         
-        # Header Section with Background Gradient
-        st.markdown("""
-        <div style="background: linear-gradient(90deg, #1B3A5C 0%, #48CAE4 100%); padding: 40px 20px; border-radius: 12px; margin-bottom: 30px;">
-            <h1 style="color: white; margin: 0; font-size: 3rem; text-align: center;">Welcome to AutoMate 🚗</h1>
-            <p style="color: white; font-size: 1.2rem; text-align: center; margin-top: 10px;">
-                Your smart car service and recommendation system powered by AI
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-
-        # Main content in two columns
-        left_col, right_col = st.columns([2, 1])
-
-        with left_col:
-            # Display the video with looping functionality
-            video_file = open(video_path, 'rb')
-            video_bytes = video_file.read()
-            video_file.close()
-
-            # Use HTML video tag with autoplay and loop attributes
-            st.markdown(
-                f"""
-                <video autoplay loop muted controls style="width: 100%;">
-                    <source src="data:video/mp4;base64,{base64.b64encode(video_bytes).decode()}" type="video/mp4">
-                    Your browser does not support the video tag.
-                </video>
-                """, 
-                unsafe_allow_html=True
-            )
-
-            # Feature Cards in a grid
-            st.markdown("<h2 style='color: #1B3A5C; margin-top: 30px;'>What We Offer</h2>", unsafe_allow_html=True)
+            # Header Section with Background Gradient
+            st.markdown("""
+            <div style="background: linear-gradient(90deg, #1B3A5C 0%, #48CAE4 100%); padding: 40px 20px; border-radius: 12px; margin-bottom: 30px;">
+                <h1 style="color: white; margin: 0; font-size: 3rem; text-align: center;">Welcome to AutoMate 🚗</h1>
+                <p style="color: white; font-size: 1.2rem; text-align: center; margin-top: 10px;">
+                    Your smart car service and recommendation system powered by AI
+                </p>
+            </div>
+            """, unsafe_allow_html=True)
 
-            col1, col2 = st.columns(2)
+            # Main content in two columns
+            left_col, right_col = st.columns([2, 1])
+
+            with left_col:
+                # Display the video with looping functionality
+                # Use HTML video tag with autoplay and loop attributes
+                st.markdown(
+                    f"""
+                    <video autoplay loop muted controls style="width: 100%;">
+                        <source src="{video_url}" type="video/mp4">
+                        Your browser does not support the video tag.
+                    </video>
+                    """, 
+                    unsafe_allow_html=True
+                )
+
+                # Feature Cards in a grid
+                st.markdown("<h2 style='color: #1B3A5C; margin-top: 30px;'>What We Offer</h2>", unsafe_allow_html=True)
+
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    st.markdown("""
+                    <div class="stCard" style="border-left: 4px solid #48CAE4;">
+                        <h4 style="color: #1B3A5C; display: flex; align-items: center;">
+                            <span style="background-color: #CAF0F8; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; margin-right: 10px;">🔍</span>
+                            Smart Recommendations
+                        </h4>
+                        <p>AI-powered service suggestions based on your vehicle's make, model, and usage patterns.</p>
+                    </div>
+                    """, unsafe_allow_html=True)
 
-            with col1:
-                st.markdown("""
-                <div class="stCard" style="border-left: 4px solid #48CAE4;">
-                    <h4 style="color: #1B3A5C; display: flex; align-items: center;">
-                        <span style="background-color: #CAF0F8; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; margin-right: 10px;">🔍</span>
-                        Smart Recommendations
-                    </h4>
-                    <p>AI-powered service suggestions based on your vehicle's make, model, and usage patterns.</p>
-                </div>
-                """, unsafe_allow_html=True)
+                    st.markdown("""
+                    <div class="stCard" style="border-left: 4px solid #00B4D8;">
+                        <h4 style="color: #1B3A5C; display: flex; align-items: center;">
+                            <span style="background-color: #CAF0F8; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; margin-right: 10px;">📅</span>
+                            Easy Booking
+                        </h4>
+                        <p>Schedule services with just a few clicks and get instant confirmation.</p>
+                    </div>
+                    """, unsafe_allow_html=True)
 
-                st.markdown("""
-                <div class="stCard" style="border-left: 4px solid #00B4D8;">
-                    <h4 style="color: #1B3A5C; display: flex; align-items: center;">
-                        <span style="background-color: #CAF0F8; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; margin-right: 10px;">📅</span>
-                        Easy Booking
-                    </h4>
-                    <p>Schedule services with just a few clicks and get instant confirmation.</p>
-                </div>
-                """, unsafe_allow_html=True)
+                with col2:
+                    st.markdown("""
+                    <div class="stCard" style="border-left: 4px solid #0077B6;">
+                        <h4 style="color: #1B3A5C; display: flex; align-items: center;">
+                            <span style="background-color: #CAF0F8; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; margin-right: 10px;">🔔</span>
+                            Timely Reminders
+                        </h4>
+                        <p>Never miss an important service with our smart notification system.</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                    st.markdown("""
+                    <div class="stCard" style="border-left: 4px solid #023E8A;">
+                        <h4 style="color: #1B3A5C; display: flex; align-items: center;">
+                            <span style="background-color: #CAF0F8; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; margin-right: 10px;">💬</span>
+                            Expert Support
+                        </h4>
+                        <p>Get answers to all your car maintenance questions with our intelligent chatbot.</p>
+                    </div>
+                    """, unsafe_allow_html=True)
 
-            with col2:
+            with right_col:
+                # Call to action card
                 st.markdown("""
-                <div class="stCard" style="border-left: 4px solid #0077B6;">
-                    <h4 style="color: #1B3A5C; display: flex; align-items: center;">
-                        <span style="background-color: #CAF0F8; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; margin-right: 10px;">🔔</span>
-                        Timely Reminders
-                    </h4>
-                    <p>Never miss an important service with our smart notification system.</p>
+                <div class="stCard" style="border-left: 4px solid #48CAE4; background-color: #F8FCFF;">
+                    <h3 style="color: #1B3A5C; text-align: center;">Ready to Get Started?</h3>
+                    <p style="text-align: center;">Join thousands of car owners who trust AutoMate for their vehicle maintenance needs.</p>
+                    <div style="display: flex; flex-direction: column; gap: 15px; margin-top: 20px;">
+                        <a href="#register" style="text-decoration: none;">
+                            <button style="background-color: #48CAE4; color: white; width: 100%; padding: 12px; border: none; border-radius: 8px; font-size: 16px; font-weight: 500; cursor: pointer; transition: all 0.3s ease; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                                Create an Account
+                            </button>
+                        </a>
+                        <a href="#login" style="text-decoration: none;">
+                            <button style="background-color: transparent; color: #48CAE4; width: 100%; padding: 12px; border: 2px solid #48CAE4; border-radius: 8px; font-size: 16px; font-weight: 500; cursor: pointer; transition: all 0.3s ease;">
+                                Login
+                            </button>
+                        </a>
+                    </div>
                 </div>
                 """, unsafe_allow_html=True)
 
+                # Quick Stats Card
                 st.markdown("""
-                <div class="stCard" style="border-left: 4px solid #023E8A;">
-                    <h4 style="color: #1B3A5C; display: flex; align-items: center;">
-                        <span style="background-color: #CAF0F8; border-radius: 50%; width: 40px; height: 40px; display: flex; justify-content: center; align-items: center; margin-right: 10px;">💬</span>
-                        Expert Support
-                    </h4>
-                    <p>Get answers to all your car maintenance questions with our intelligent chatbot.</p>
+                <div class="stCard" style="margin-top: 20px; border-left: 4px solid #1B3A5C; background-color: #F5F7FA;">
+                    <h4 style="color: #1B3A5C; text-align: center;">Why AutoMate?</h4>
+                    <div style="display: flex; justify-content: space-between; text-align: center; margin-top: 15px;">
+                        <div>
+                            <h2 style="color: #48CAE4; margin: 0; font-size: 2rem;">5k+</h2>
+                            <p style="margin: 0; color: #3A506B;">Happy Users</p>
+                        </div>
+                        <div>
+                            <h2 style="color: #48CAE4; margin: 0; font-size: 2rem;">98%</h2>
+                            <p style="margin: 0; color: #3A506B;">Satisfaction</p>
+                        </div>
+                        <div>
+                            <h2 style="color: #48CAE4; margin: 0; font-size: 2rem;">24/7</h2>
+                            <p style="margin: 0; color: #3A506B;">Support</p>
+                        </div>
+                    </div>
                 </div>
                 """, unsafe_allow_html=True)
 
-        with right_col:
-            # Call to action card
-            st.markdown("""
-            <div class="stCard" style="border-left: 4px solid #48CAE4; background-color: #F8FCFF;">
-                <h3 style="color: #1B3A5C; text-align: center;">Ready to Get Started?</h3>
-                <p style="text-align: center;">Join thousands of car owners who trust AutoMate for their vehicle maintenance needs.</p>
-                <div style="display: flex; flex-direction: column; gap: 15px; margin-top: 20px;">
-                    <a href="#register" style="text-decoration: none;">
-                        <button style="background-color: #48CAE4; color: white; width: 100%; padding: 12px; border: none; border-radius: 8px; font-size: 16px; font-weight: 500; cursor: pointer; transition: all 0.3s ease; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                            Create an Account
-                        </button>
-                    </a>
-                    <a href="#login" style="text-decoration: none;">
-                        <button style="background-color: transparent; color: #48CAE4; width: 100%; padding: 12px; border: 2px solid #48CAE4; border-radius: 8px; font-size: 16px; font-weight: 500; cursor: pointer; transition: all 0.3s ease;">
-                            Login
+                # Chatbot Preview
+                st.markdown("""
+                <div class="stCard" style="margin-top: 20px; border-left: 4px solid #023E8A; background-color: #F5F7FA;">
+                    <h4 style="color: #1B3A5C;">Quick Question?</h4>
+                    <p>Try our chatbot for instant answers about car maintenance.</p>
+                    <a href="#chatbot" style="text-decoration: none;">
+                        <button style="background-color: #023E8A; color: white; width: 100%; padding: 10px; border: none; border-radius: 8px; font-size: 16px; cursor: pointer;">
+                            Chat Now
                         </button>
                     </a>
                 </div>
-            </div>
-            """, unsafe_allow_html=True)
-
-            # Quick Stats Card
-            st.markdown("""
-            <div class="stCard" style="margin-top: 20px; border-left: 4px solid #1B3A5C; background-color: #F5F7FA;">
-                <h4 style="color: #1B3A5C; text-align: center;">Why AutoMate?</h4>
-                <div style="display: flex; justify-content: space-between; text-align: center; margin-top: 15px;">
-                    <div>
-                        <h2 style="color: #48CAE4; margin: 0; font-size: 2rem;">5k+</h2>
-                        <p style="margin: 0; color: #3A506B;">Happy Users</p>
-                    </div>
-                    <div>
-                        <h2 style="color: #48CAE4; margin: 0; font-size: 2rem;">98%</h2>
-                        <p style="margin: 0; color: #3A506B;">Satisfaction</p>
-                    </div>
-                    <div>
-                        <h2 style="color: #48CAE4; margin: 0; font-size: 2rem;">24/7</h2>
-                        <p style="margin: 0; color: #3A506B;">Support</p>
-                    </div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-
-            # Chatbot Preview
-            st.markdown("""
-            <div class="stCard" style="margin-top: 20px; border-left: 4px solid #023E8A; background-color: #F5F7FA;">
-                <h4 style="color: #1B3A5C;">Quick Question?</h4>
-                <p>Try our chatbot for instant answers about car maintenance.</p>
-                <a href="#chatbot" style="text-decoration: none;">
-                    <button style="background-color: #023E8A; color: white; width: 100%; padding: 10px; border: none; border-radius: 8px; font-size: 16px; cursor: pointer;">
-                        Chat Now
-                    </button>
-                </a>
-            </div>
-            """, unsafe_allow_html=True)
+                """, unsafe_allow_html=True)
 
-        # Testimonials Section
-        st.markdown("<h2 style='color: #1B3A5C; margin-top: 40px; text-align: center;'>What Our Customers Say</h2>", unsafe_allow_html=True)
+            # Testimonials Section
+            st.markdown("<h2 style='color: #1B3A5C; margin-top: 40px; text-align: center;'>What Our Customers Say</h2>", unsafe_allow_html=True)
 
-        testimonial_cols = st.columns(3)
+            testimonial_cols = st.columns(3)
 
-        testimonials = [
-            {"name": "John D.", "rating": "⭐⭐⭐⭐⭐", "text": "AutoMate has simplified my car maintenance routine. The AI recommendations are spot on!"},
-            {"name": "Sarah M.", "rating": "⭐⭐⭐⭐⭐", "text": "I love how easy it is to book services and get reminders. Never missed an oil change since."},
-            {"name": "Mike T.", "rating": "⭐⭐⭐⭐", "text": "The chatbot answered all my questions about my car issues. Saved me an unnecessary trip to the mechanic."}
-        ]
+            testimonials = [
+                {"name": "John D.", "rating": "⭐⭐⭐⭐⭐", "text": "AutoMate has simplified my car maintenance routine. The AI recommendations are spot on!"},
+                {"name": "Sarah M.", "rating": "⭐⭐⭐⭐⭐", "text": "I love how easy it is to book services and get reminders. Never missed an oil change since."},
+                {"name": "Mike T.", "rating": "⭐⭐⭐⭐", "text": "The chatbot answered all my questions about my car issues. Saved me an unnecessary trip to the mechanic."}
+            ]
 
-        for i, col in enumerate(testimonial_cols):
-            with col:
-                st.markdown(f"""
-                <div class="stCard" style="height: 220px; border-left: 4px solid #48CAE4; background-color: #F8FCFF;">
-                    <div style="margin-bottom: 10px; color: #FFD700;">{testimonials[i]['rating']}</div>
-                    <p style="font-style: italic;">"{testimonials[i]['text']}"</p>
-                    <p style="text-align: right; font-weight: 500; margin-top: 15px; color: #1B3A5C;">- {testimonials[i]['name']}</p>
-                </div>
-                """, unsafe_allow_html=True)
+            for i, col in enumerate(testimonial_cols):
+                with col:
+                    st.markdown(f"""
+                    <div class="stCard" style="height: 220px; border-left: 4px solid #48CAE4; background-color: #F8FCFF;">
+                        <div style="margin-bottom: 10px; color: #FFD700;">{testimonials[i]['rating']}</div>
+                        <p style="font-style: italic;">"{testimonials[i]['text']}"</p>
+                        <p style="text-align: right; font-weight: 500; margin-top: 15px; color: #1B3A5C;">- {testimonials[i]['name']}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
 
-        # How It Works Section
-        st.markdown("<h2 style='color: #1B3A5C; margin-top: 40px; text-align: center;'>How It Works</h2>", unsafe_allow_html=True)
+            # How It Works Section
+            st.markdown("<h2 style='color: #1B3A5C; margin-top: 40px; text-align: center;'>How It Works</h2>", unsafe_allow_html=True)
 
-        steps_cols = st.columns(4)
+            steps_cols = st.columns(4)
 
-        steps = [
-            {"icon": "👤", "title": "Create Account", "desc": "Sign up and add your vehicle details"},
-            {"icon": "🚗", "title": "Add Your Car", "desc": "Enter your car's make, model, and details"},
-            {"icon": "🔍", "title": "Get Recommendations", "desc": "Receive AI-powered service suggestions"},
-            {"icon": "📅", "title": "Book Services", "desc": "Schedule maintenance with just a few clicks"}
-        ]
+            steps = [
+                {"icon": "👤", "title": "Create Account", "desc": "Sign up and add your vehicle details"},
+                {"icon": "🚗", "title": "Add Your Car", "desc": "Enter your car's make, model, and details"},
+                {"icon": "🔍", "title": "Get Recommendations", "desc": "Receive AI-powered service suggestions"},
+                {"icon": "📅", "title": "Book Services", "desc": "Schedule maintenance with just a few clicks"}
+            ]
 
-        for i, col in enumerate(steps_cols):
-            with col:
-                st.markdown(f"""
-                <div style="text-align: center; padding: 20px 10px;">
-                    <div style="background-color: #CAF0F8; width: 60px; height: 60px; border-radius: 50%; display: flex; justify-content: center; align-items: center; margin: 0 auto; font-size: 24px;">
-                        {steps[i]['icon']}
+            for i, col in enumerate(steps_cols):
+                with col:
+                    st.markdown(f"""
+                    <div style="text-align: center; padding: 20px 10px;">
+                        <div style="background-color: #CAF0F8; width: 60px; height: 60px; border-radius: 50%; display: flex; justify-content: center; align-items: center; margin: 0 auto; font-size: 24px;">
+                            {steps[i]['icon']}
+                        </div>
+                        <h4 style="color: #1B3A5C; margin-top: 15px;">{steps[i]['title']}</h4>
+                        <p style="font-size: 0.9rem;">{steps[i]['desc']}</p>
                     </div>
-                    <h4 style="color: #1B3A5C; margin-top: 15px;">{steps[i]['title']}</h4>
-                    <p style="font-size: 0.9rem;">{steps[i]['desc']}</p>
-                </div>
-                """, unsafe_allow_html=True)
+                    """, unsafe_allow_html=True)
 
-        # Bottom CTA
-        st.markdown("""
-        <div style="background: linear-gradient(90deg, #1B3A5C 0%, #48CAE4 100%); padding: 30px; border-radius: 12px; margin-top: 40px; text-align: center;">
-            <h2 style="color: white; margin: 0;">Ready to Experience Smart Car Care?</h2>
-            <p style="color: white; margin: 10px 0 20px;">Join AutoMate today and keep your vehicle in perfect condition.</p>
-            <a href="#register" style="text-decoration: none;">
-                <button style="background-color: white; color: #1B3A5C; padding: 12px 30px; border: none; border-radius: 8px; font-size: 16px; font-weight: 600; cursor: pointer; transition: all 0.3s ease;">
-                    Get Started Now
-                </button>
-            </a>
-        </div>
-        """, unsafe_allow_html=True)
-
-    except FileNotFoundError as e:
-        st.error(str(e))
-
-# Register User
-if menu == "Register":
-    st.subheader("🔑 Register")
-    with st.form("register_form"):
-        name = st.text_input("Full Name", placeholder="Enter your full name")
-        email = st.text_input("Email", placeholder="Enter your email")
-        phone = st.text_input("Phone", placeholder="Enter your phone number")
-        password = st.text_input("Password", type="password", placeholder="Enter a password")
-        submit_button = st.form_submit_button("Register")
-
-        if submit_button:
-            conn = get_db_connection()
-            try:
-                conn.execute('INSERT INTO users (name, email, phone, password) VALUES (?, ?, ?, ?)', 
-                             (name, email, phone, password))
-                conn.commit()
-                st.success("✅ Registration successful!")
-            except sqlite3.IntegrityError:
-                st.error("❌ Email already registered!")
-            except Exception as e:
-                st.error(f"❌ Registration failed: {str(e)}")
-            finally:
-                conn.close()        
-
-# Login User
-elif menu == "Login":
-    st.subheader("🔐 Login")
-    with st.form("login_form"):
-        email = st.text_input("Email", placeholder="Enter your email")
-        password = st.text_input("Password", type="password", placeholder="Enter your password")
-        admin_key = st.text_input("Admin Key (optional)", type="password", placeholder="Enter admin key")
-        submit_button = st.form_submit_button("Login")
-
-        if submit_button:
-            conn = get_db_connection()
-            user = conn.execute('SELECT * FROM users WHERE email = ? AND password = ?', (email, password)).fetchone()
-            admin = conn.execute('SELECT * FROM admins WHERE email = ? AND password = ? AND admin_key = ?', 
-                                 (email, password, admin_key)).fetchone()
-            conn.close()
-
-            if user:
-                st.session_state.user_id = user["id"]
-                st.session_state.is_admin = False
-                st.success("✅ Login successful!")
-            elif admin:
-                st.session_state.is_admin = True
-                st.success("✅ Admin login successful!")
-            else:
-                st.error("❌ Invalid credentials!")
+            # Bottom CTA
+            st.markdown("""
+            <div style="background: linear-gradient(90deg, #1B3A5C 0%, #48CAE4 100%); padding: 30px; border-radius: 12px; margin-top: 40px; text-align: center;">
+                <h2 style="color: white; margin: 0;">Ready to Experience Smart Car Care?</h2>
+                <p style="color: white; margin: 10px 0 20px;">Join AutoMate today and keep your vehicle in perfect condition.</p>
+                <a href="#register" style="text-decoration: none;">
+                    <button style="background-color: white; color: #1B3A5C; padding: 12px 30px; border: none; border-radius: 8px; font-size: 16px; font-weight: 600; cursor: pointer; transition: all 0.3s ease;">
+                        Get Started Now
+                    </button>
+                </a>
+            </div>
+            """, unsafe_allow_html=True)
 
-# Add Car
-elif menu == "Add Car":
-    if st.session_state.user_id is None:
-        st.error("❌ Please log in first!")
-    else:
-        st.subheader("🚘 Add Car")
-        with st.form("add_car_form"):
-            make = st.text_input("Make", placeholder="Enter car make")
-            model_name = st.text_input("Model", placeholder="Enter car model")
-            year = st.number_input("Year", min_value=1900, max_value=datetime.now().year)
-            mileage = st.number_input("Mileage", min_value=0)
-            engine_type = st.selectbox("Engine Type", ["Gasoline", "Diesel", "Hybrid", "Electric"])
-            driving_condition = st.selectbox("Driving Habits", ["Fair", "Good", "Excellent"])
-            submit_button = st.form_submit_button("Add Car")
+        except FileNotFoundError as e:
+            st.error(str(e))
+
+    # Register User
+    if menu == "Register":
+        st.subheader("🔑 Register")
+        with st.form("register_form"):
+            name = st.text_input("Full Name", placeholder="Enter your full name")
+            email = st.text_input("Email", placeholder="Enter your email")
+            phone = st.text_input("Phone", placeholder="Enter your phone number")
+            password = st.text_input("Password", type="password", placeholder="Enter a password")
+            submit_button = st.form_submit_button("Register")
 
             if submit_button:
                 conn = get_db_connection()
-                conn.execute('''
-                    INSERT INTO cars (user_id, make, model, year, mileage, engine_type, driving_condition)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (st.session_state.user_id, make, model_name, year, mileage, engine_type, driving_condition))
-                conn.commit()
-                conn.close()
-                st.success("🚀 Car added successfully!")
-
-# AI-Driven Service Recommendations
-elif menu == "Service Recommendations":
-    if st.session_state.user_id is None:
-        st.error("❌ Please log in first!")
-    else:
-        st.subheader("🔍 AI-Driven Service Recommendations")
-        conn = get_db_connection()
-        cars = conn.execute('SELECT * FROM cars WHERE user_id = ?', (st.session_state.user_id,)).fetchall()
-        conn.close()
-        
-        # Create a dictionary of car options for the dropdown
-        car_options = {f"{car['make']} {car['model']} ({car['year']})": car for car in cars}
-        selected_car = st.selectbox("Select Your Car", list(car_options.keys()))
-
-        if st.button("Get Recommendations"):
-            # Show a loading spinner while processing
-            with st.spinner("🤖 Generating recommendations..."):
                 try:
-                    # Get details of the selected car
-                    car_details = car_options[selected_car]
-
-                    # Prepare car data for the AI model
-                    car_data = {
-                        'mileage': car_details['mileage'],
-                        'year': car_details['year'],
-                        'driving_condition': car_details['driving_condition']  # Ensure this matches the model's features
-                    }
-
-                    # Get the recommendation from the AI model
-                    recommendation = recommend_services(model, label_encoders, car_data)
-
-                    # Display the recommendation
-                    st.toast("✅ Recommendation generated successfully!", icon="🎉")
-                    st.write(f"📌 Recommended Service: **{recommendation}**")
-
-                    # Display car details used for the recommendation
-                    st.write("### Car Details Used:")
-                    st.write(f"- **Make**: {car_details['make']}")
-                    st.write(f"- **Model**: {car_details['model']}")
-                    st.write(f"- **Year**: {car_details['year']}")
-                    st.write(f"- **Mileage**: {car_details['mileage']} miles")
-                    st.write(f"- **Engine Type**: {car_details['engine_type']}")
-                    st.write(f"- **Driving Condition**: {car_details['driving_condition']}")
-
-                    # Display maintenance history (if available)
-                    if 'last_maintenance_date' in car_details and 'last_maintenance_type' in car_details:
-                        st.write("### Maintenance History:")
-                        st.write(f"- **Last Maintenance Date**: {car_details['last_maintenance_date']}")
-                        st.write(f"- **Last Maintenance Type**: {car_details['last_maintenance_type']}")
-
+                    conn.execute('INSERT INTO users (name, email, phone, password) VALUES (?, ?, ?, ?)', 
+                                 (name, email, phone, password))
+                    conn.commit()
+                    st.success("✅ Registration successful!")
+                except sqlite3.IntegrityError:
+                    st.error("❌ Email already registered!")
                 except Exception as e:
-                    st.error(f"❌ Failed to generate recommendations: {e}")
+                    st.error(f"❌ Registration failed: {str(e)}")
+                finally:
+                    conn.close()        
+
+    # Login User
+    elif menu == "Login":
+        st.subheader("🔐 Login")
+        with st.form("login_form"):
+            email = st.text_input("Email", placeholder="Enter your email")
+            password = st.text_input("Password", type="password", placeholder="Enter your password")
+            admin_key = st.text_input("Admin Key (optional)", type="password", placeholder="Enter admin key")
+            submit_button = st.form_submit_button("Login")
 
-# Book a Service
-elif menu == "Book Service":
-    if st.session_state.user_id is None:
-        st.error("❌ Please log in first!")
-    else:
-        st.subheader("📅 Book a Service")
-        conn = get_db_connection()
-        cars = conn.execute('SELECT * FROM cars WHERE user_id = ?', (st.session_state.user_id,)).fetchall()
-        conn.close()
-
-        car_options = {f"{car['make']} {car['model']} ({car['year']})": car for car in cars}
-        selected_car = st.selectbox("Select Your Car", list(car_options.keys()))
-        service_type = st.selectbox("Service Type", ["Oil Change", "Tire Rotation", "Battery Check", "Brake Inspection"])
-        booking_date = st.date_input("Booking Date")
-        time_slot = st.selectbox("Time Slot", ["Morning", "Afternoon", "Evening"])
-
-        if st.button("Book Service"):
-            if booking_date < date.today():
-                st.error("❌ Booking date cannot be in the past!")
-            else:
-                car_details = car_options[selected_car]
-                conn = get_db_connection()
-                conn.execute('''
-                    INSERT INTO bookings (user_id, car_id, service_type, appointment_date, time_slot, status)
-                    VALUES (?, ?, ?, ?, ?, 'Pending')
-                ''', (st.session_state.user_id, car_details["id"], service_type, booking_date.strftime("%Y-%m-%d"), time_slot))
-                conn.commit()
-                conn.close()
-                st.toast("✅ Your booking has been implemented successfully!", icon="🎉")
-
-# User Profile
-elif menu == "User Profile":
-    if st.session_state.user_id is None:
-        st.error("❌ Please log in first!")
-    else:
-        st.subheader("👤 User Profile")
-        conn = get_db_connection()
-        user = conn.execute('SELECT * FROM users WHERE id = ?', (st.session_state.user_id,)).fetchone()
-        cars = conn.execute('SELECT * FROM cars WHERE user_id = ?', (st.session_state.user_id,)).fetchall()
-        bookings = conn.execute('SELECT * FROM bookings WHERE user_id = ?', (st.session_state.user_id,)).fetchall()
-        conn.close()
-
-        st.write(f"### Welcome, {user['name']}!")
-        st.write(f"**Email:** {user['email']}")
-        st.write(f"**Phone:** {user['phone']}")
-
-        # Update User Details Form
-        st.write("### Update Your Profile")
-        with st.form("update_profile_form"):
-            new_name = st.text_input("Full Name", value=user['name'], placeholder="Enter your full name")
-            new_email = st.text_input("Email", value=user['email'], placeholder="Enter your email")
-            new_phone = st.text_input("Phone", value=user['phone'], placeholder="Enter your phone number")
-            update_button = st.form_submit_button("Update Profile")
-
-            if update_button:
-                if not new_name or not new_email or not new_phone:
-                    st.error("❌ Please fill in all fields!")
+            if submit_button:
+                with db_connection() as conn:
+                    user = conn.execute('SELECT * FROM users WHERE email = ? AND password = ?', (email, password)).fetchone()
+                    admin = conn.execute('SELECT * FROM admins WHERE email = ? AND password = ? AND admin_key = ?', 
+                                         (email, password, admin_key)).fetchone()
+
+                if user or admin:
+                    # Chat messages are stored under the session's user, so a new login starts a new chat
+                    st.session_state.pop("chat_history", None)
+                if user:
+                    st.session_state.user_id = user["id"]
+                    st.session_state.is_admin = False
+                    st.success("✅ Login successful!")
+                elif admin:
+                    st.session_state.is_admin = True
+                    st.success("✅ Admin login successful!")
                 else:
-                    conn = get_db_connection()
+                    st.error("❌ Invalid credentials!")
+
+    # Add Car
+    elif menu == "Add Car":
+        if st.session_state.user_id is None:
+            st.error("❌ Please log in first!")
+        else:
+            st.subheader("🚘 Add Car")
+            with st.form("add_car_form"):
+                make = st.text_input("Make", placeholder="Enter car make")
+                model_name = st.text_input("Model", placeholder="Enter car model")
+                year = st.number_input("Year", min_value=1900, max_value=datetime.now().year)
+                mileage = st.number_input("Mileage", min_value=0)
+                engine_type = st.selectbox("Engine Type", ["Gasoline", "Diesel", "Hybrid", "Electric"])
+                driving_condition = st.selectbox("Driving Habits", ["Fair", "Good", "Excellent"])
+                submit_button = st.form_submit_button("Add Car")
+
+                if submit_button:
+                    with db_connection() as conn:
+                        car_id = conn.execute('''
+                            INSERT INTO cars (user_id, make, model, year, mileage, engine_type, driving_condition)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ''', (st.session_state.user_id, make, model_name, year, mileage, engine_type, driving_condition)).lastrowid
+                    invalidate_user(st.session_state.user_id)
+                    st.success("🚀 Car added successfully!")
+
+                    # Precompute the car's recommendation (best effort): if the model rejects the car, cannot
+                    # be loaded or times out, recommend_for_car() computes it when the recommendation is viewed
                     try:
-                        conn.execute('''
-                            UPDATE users
-                            SET name = ?, email = ?, phone = ?
-                            WHERE id = ?
-                        ''', (new_name, new_email, new_phone, st.session_state.user_id))
-                        conn.commit()
-                        st.success("✅ Profile updated successfully!")
-                    except sqlite3.IntegrityError:
-                        st.error("❌ Email already registered!")
+                        recommendation = inference.recommend({
+                            'mileage': mileage, 'year': year, 'driving_condition': driving_condition})
+                        with db_connection() as conn:
+                            upsert_recommendation(conn, car_id, recommendation, inference.model_version())
+                    except (ValueError, OSError, sqlite3.Error) as e:
+                        st.warning(f"⚠️ No recommendation for this car yet ({e}). It will be computed on the Service Recommendations page.")
+
+    # AI-Driven Service Recommendations
+    elif menu == "Service Recommendations":
+        if st.session_state.user_id is None:
+            st.error("❌ Please log in first!")
+        else:
+            st.subheader("🔍 AI-Driven Service Recommendations")
+            cars = get_user_cars(st.session_state.user_id)
+        
+            # Create a dictionary of car options for the dropdown
+            car_options = {f"{car['make']} {car['model']} ({car['year']})": car for car in cars}
+            selected_car = st.selectbox("Select Your Car", list(car_options.keys()))
+
+            if st.button("Get Recommendations"):
+                # Show a loading spinner while processing
+                with st.spinner("🤖 Generating recommendations..."):
+                    try:
+                        # Get details of the selected car
+                        car_details = car_options[selected_car]
+
+                        # Stored recommendation, recomputed only if the car or the model changed
+                        conn = get_db_connection()
+                        try:
+                            recommendation = recommend_for_car(conn, car_details, inference.recommend, inference.model_version())
+                        finally:
+                            conn.close()
+
+                        # Display the recommendation
+                        st.toast("✅ Recommendation generated successfully!", icon="🎉")
+                        st.write(f"📌 Recommended Service: **{recommendation}**")
+
+                        # Display car details used for the recommendation
+                        st.write("### Car Details Used:")
+                        st.write(f"- **Make**: {car_details['make']}")
+                        st.write(f"- **Model**: {car_details['model']}")
+                        st.write(f"- **Year**: {car_details['year']}")
+                        st.write(f"- **Mileage**: {car_details['mileage']} miles")
+                        st.write(f"- **Engine Type**: {car_details['engine_type']}")
+                        st.write(f"- **Driving Condition**: {car_details['driving_condition']}")
+
+                        # Display maintenance history (if available)
+                        if 'last_maintenance_date' in car_details and 'last_maintenance_type' in car_details:
+                            st.write("### Maintenance History:")
+                            st.write(f"- **Last Maintenance Date**: {car_details['last_maintenance_date']}")
+                            st.write(f"- **Last Maintenance Type**: {car_details['last_maintenance_type']}")
+
                     except Exception as e:
-                        st.error(f"❌ Failed to update profile: {str(e)}")
-                    finally:
-                        conn.close()
-
-        st.write("### Your Cars 🚗")
-        if cars:
-            for car in cars:
-                with st.container():
-                    st.markdown(f"""
-                    <div class="stCard">
-                        <h4 style="color: #4CAF50;">{car['make']} {car['model']} ({car['year']})</h4>
-                        <p><b>Mileage:</b> {car['mileage']} miles</p>
-                        <p><b>Engine Type:</b> {car['engine_type']}</p>
-                        <p><b>Driving Condition:</b> {car['driving_condition']}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                        st.error(f"❌ Failed to generate recommendations: {e}")
+
+    # Book a Service
+    elif menu == "Book Service":
+        if st.session_state.user_id is None:
+            st.error("❌ Please log in first!")
+        else:
+            st.subheader("📅 Book a Service")
+            cars = get_user_cars(st.session_state.user_id)
+
+            car_options = {f"{car['make']} {car['model']} ({car['year']})": car for car in cars}
+            selected_car = st.selectbox("Select Your Car", list(car_options.keys()))
+            service_type = st.selectbox("Service Type", SERVICE_TYPES)
+            booking_date = st.date_input("Booking Date")
+
+            with db_connection() as conn:
+                availability = get_slot_availability(conn, booking_date)
+                free_slots = next_free_slots(conn, max(booking_date, date.today()))
+            time_slot = st.selectbox("Time Slot", TIME_SLOTS,
+                                     format_func=lambda slot: f"{slot} ({availability[slot]} left)" if availability[slot] else f"{slot} (full)")
+            if free_slots:
+                st.caption("Next free slots: " + ", ".join(f"{row['slot_date']} {row['time_slot']}" for row in free_slots))
+
+            if st.button("Book Service"):
+                if booking_date < date.today():
+                    st.error("❌ Booking date cannot be in the past!")
+                else:
+                    car_details = car_options[selected_car]
+                    # Take the slot and insert the booking in one transaction so concurrent sessions cannot overbook;
+                    # an error anywhere in the block rolls back the reservation too
+                    with db_connection() as conn:
+                        reserved = reserve_slot(conn, booking_date.strftime("%Y-%m-%d"), time_slot)
+                        if reserved:
+                            conn.execute('''
+                                INSERT INTO bookings (user_id, car_id, service_type, appointment_date, time_slot, status)
+                                VALUES (?, ?, ?, ?, ?, 'Pending')
+                            ''', (st.session_state.user_id, car_details["id"], service_type, booking_date.strftime("%Y-%m-%d"), time_slot))
+                            # Queue the confirmation email in the same transaction; the outbox worker sends it
+                            if email_enabled():
+                                user = conn.execute('SELECT email FROM users WHERE id = ?', (st.session_state.user_id,)).fetchone()
+                                enqueue_email(user["email"], "AutoMate booking received",
+                                              f"Your {service_type} on {booking_date.strftime('%Y-%m-%d')} ({time_slot}) is pending approval.",
+                                              user_id=st.session_state.user_id, conn=conn)
+                    if not reserved:
+                        st.error(f"❌ {time_slot} on {booking_date.strftime('%Y-%m-%d')} is fully booked. Please pick another slot.")
+                    else:
+                        invalidate_user(st.session_state.user_id)
+                        if email_enabled():
+                            start_email_worker().wake()
+                        st.toast("✅ Your booking has been implemented successfully!", icon="🎉")
+
+    # User Profile
+    elif menu == "User Profile":
+        if st.session_state.user_id is None:
+            st.error("❌ Please log in first!")
         else:
-            st.warning("No cars added yet.")
+            st.subheader("👤 User Profile")
+            user = get_user(st.session_state.user_id)
+            cars = get_user_cars(st.session_state.user_id)
+            bookings = get_user_bookings(st.session_state.user_id)
+
+            st.write(f"### Welcome, {user['name']}!")
+            st.write(f"**Email:** {user['email']}")
+            st.write(f"**Phone:** {user['phone']}")
+
+            # Update User Details Form
+            st.write("### Update Your Profile")
+            with st.form("update_profile_form"):
+                new_name = st.text_input("Full Name", value=user['name'], placeholder="Enter your full name")
+                new_email = st.text_input("Email", value=user['email'], placeholder="Enter your email")
+                new_phone = st.text_input("Phone", value=user['phone'], placeholder="Enter your phone number")
+                update_button = st.form_submit_button("Update Profile")
+
+                if update_button:
+                    if not new_name or not new_email or not new_phone:
+                        st.error("❌ Please fill in all fields!")
+                    else:
+                        conn = get_db_connection()
+                        try:
+                            conn.execute('''
+                                UPDATE users
+                                SET name = ?, email = ?, phone = ?
+                                WHERE id = ?
+                            ''', (new_name, new_email, new_phone, st.session_state.user_id))
+                            conn.commit()
+                            invalidate_user(st.session_state.user_id)
+                            st.success("✅ Profile updated successfully!")
+                        except sqlite3.IntegrityError:
+                            st.error("❌ Email already registered!")
+                        except Exception as e:
+                            st.error(f"❌ Failed to update profile: {str(e)}")
+                        finally:
+                            conn.close()
+
+            st.write("### Your Cars 🚗")
+            if cars:
+                for car in cars:
+                    with st.container():
+                        st.markdown(f"""
+                        <div class="stCard">
+                            <h4 style="color: #4CAF50;">{car['make']} {car['model']} ({car['year']})</h4>
+                            <p><b>Mileage:</b> {car['mileage']} miles</p>
+                            <p><b>Engine Type:</b> {car['engine_type']}</p>
+                            <p><b>Driving Condition:</b> {car['driving_condition']}</p>
+                        </div>
+                        """, unsafe_allow_html=True)
+            else:
+                st.warning("No cars added yet.")
+
+            st.write("### Your Bookings 📅")
+            if bookings:
+                for booking in bookings:
+                    with st.container():
+                        st.markdown(f"""
+                        <div class="stCard">
+                            <h4 style="color: #4CAF50;">Booking ID: {booking['id']}</h4>
+                            <p><b>Service:</b> {booking['service_type']}</p>
+                            <p><b>Date:</b> {booking['appointment_date']}</p>
+                            <p><b>Time Slot:</b> {booking['time_slot']}</p>
+                            <p><b>Status:</b> {booking['status']}</p>
+                        </div>
+                        """, unsafe_allow_html=True)
+            else:
+                st.warning("No bookings found.")
 
-        st.write("### Your Bookings 📅")
-        if bookings:
-            for booking in bookings:
-                with st.container():
-                    st.markdown(f"""
-                    <div class="stCard">
-                        <h4 style="color: #4CAF50;">Booking ID: {booking['id']}</h4>
-                        <p><b>Service:</b> {booking['service_type']}</p>
-                        <p><b>Date:</b> {booking['appointment_date']}</p>
-                        <p><b>Time Slot:</b> {booking['time_slot']}</p>
-                        <p><b>Status:</b> {booking['status']}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+    # Admin Dashboard
+    elif menu == "Admin Dashboard":
+        if not st.session_state.is_admin:
+            st.error("❌ Admin access required!")
         else:
-            st.warning("No bookings found.")
+            import pandas as pd
+            import plotly.express as px
 
-# Admin Dashboard
-elif menu == "Admin Dashboard":
-    if not st.session_state.is_admin:
-        st.error("❌ Admin access required!")
-    else:
-        # Stylish Welcome Header with Dark Theme
-        st.markdown("""
-        <div style="background: linear-gradient(90deg, #1B3A5C 0%, #48CAE4 100%); padding: 20px; border-radius: 12px; text-align: center;">
-            <h1 style="color: white; margin: 0;">Welcome, Admin! 👋</h1>
-            <p style="color: white; font-size: 1.1rem;">Manage bookings, approve services, and oversee system analytics.</p>
-        </div>
-        """, unsafe_allow_html=True)
-
-        conn = get_db_connection()
-        bookings = conn.execute('SELECT * FROM bookings').fetchall()
-        conn.close()
-
-        # Convert bookings to DataFrame
-        bookings_df = pd.DataFrame(bookings, columns=["ID", "User ID", "Car ID", "Service Type", "Appointment Date", "Time Slot", "Status"])
-
-        # Booking Status Pie Chart
-        status_counts = bookings_df["Status"].value_counts().reset_index()
-        status_counts.columns = ["Status", "Count"]
-        fig_status = px.pie(status_counts, names="Status", values="Count", title="Booking Status Distribution", 
-                            color_discrete_sequence=px.colors.sequential.RdBu, template="plotly_dark")
-
-        # Service Type Bar Chart
-        service_counts = bookings_df["Service Type"].value_counts().reset_index()
-        service_counts.columns = ["Service Type", "Count"]
-        fig_services = px.bar(service_counts, x="Service Type", y="Count", title="Most Requested Services", 
-                              color="Count", color_continuous_scale="viridis", template="plotly_dark")
-
-        # Display charts side by side
-        col1, col2 = st.columns(2)
-        with col1:
-            st.plotly_chart(fig_status, use_container_width=True)
-        with col2:
-            st.plotly_chart(fig_services, use_container_width=True)
-
-        # Dark Table Styling
-        st.markdown("""
-        <style>
-            .dark-table {
-                background-color: #1B3A5C;
-                color: #ffffff;
-                border-radius: 8px;
-                padding: 10px;
-                border: 1px solid #48CAE4;
-                text-align: center;
-            }
-            .dark-table th {
-                background-color: #2C3E50;
-                padding: 8px;
-            }
-            .dark-table td {
-                padding: 8px;
-                border-bottom: 1px solid #48CAE4;
-            }
-            .dark-table tr:nth-child(even) {
-                background-color: #34495E;
-            }
-        </style>
-        """, unsafe_allow_html=True)
-
-        # Convert table to HTML with custom styling
-        table_html = bookings_df.to_html(classes="dark-table", index=False, escape=False)
-        st.markdown("### 📋 All Bookings Overview", unsafe_allow_html=True)
-        st.markdown(table_html, unsafe_allow_html=True)
-
-        # Display bookings in a card layout with Dark Mode
-        st.markdown("## 📌 Recent Bookings")
-        for booking in bookings:
-            st.markdown(f"""
-            <div style="background-color: #2C3E50; border-radius: 10px; padding: 15px; margin: 10px 0; border-left: 6px solid #48CAE4;">
-                <h4 style="color: #48CAE4;">📍 Booking ID: {booking['ID']}</h4>
-                <p style="color: #ffffff;"><b>👤 User ID:</b> {booking['user_iD']}</p>
-                <p style="color: #ffffff;"><b>🚗 Service:</b> {booking['service_type']}</p>
-                <p style="color: #ffffff;"><b>📅 Date:</b> {booking['appointment_date']}</p>
-                <p style="color: #ffffff;"><b>⏰ Time Slot:</b> {booking['time_slot']}</p>
-                <p><b>📌 Status:</b> <span style="color: {'#f39c12' if booking['status'] == 'Pending' else '#27ae60'};">{booking['status']}</span></p>
-                <button style="background-color: #4CAF50; color: white; padding: 10px 20px; border: none; border-radius: 5px; font-size: 14px; cursor: pointer;">
-                    ✅ Approve {booking['ID']}
-                </button>
+            # Stylish Welcome Header with Dark Theme
+            st.markdown("""
+            <div style="background: linear-gradient(90deg, #1B3A5C 0%, #48CAE4 100%); padding: 20px; border-radius: 12px; text-align: center;">
+                <h1 style="color: white; margin: 0;">Welcome, Admin! 👋</h1>
+                <p style="color: white; font-size: 1.1rem;">Manage bookings, approve services, and oversee system analytics.</p>
             </div>
             """, unsafe_allow_html=True)
 
-        # Booking approval logic
-        for booking in bookings:
-            if st.button(f"✅ Approve {booking['ID']}"):
-                conn = get_db_connection()
-                conn.execute("UPDATE bookings SET Status = 'Approved' WHERE ID = ?", (booking['ID'],))
-                conn.commit()
-                conn.close()
-                st.success(f"✅ Booking {booking['ID']} approved!")
-                st.rerun()  # Refresh page
-# Chatbot Section
-elif menu == "Chatbot":
-    chatbot_interface()
\ No newline at end of file
+            # Keyset pagination state: stack of "before id" cursors for the pages already visited
+            if "admin_page_cursors" not in st.session_state:
+                st.session_state.admin_page_cursors = [None]
+            page_size = st.selectbox("Bookings per page", ADMIN_PAGE_SIZES, key="admin_page_size")
+
+            with db_connection() as conn:
+                status_rows = get_booking_status_counts(conn)
+                service_rows = get_service_type_counts(conn)
+                # Fetch one extra row to know whether there is a next page
+                bookings = get_bookings_page(conn, before_id=st.session_state.admin_page_cursors[-1], limit=page_size + 1)
+            has_next_page = len(bookings) > page_size
+            bookings = bookings[:page_size]
+
+            # Convert bookings to DataFrame
+            bookings_df = pd.DataFrame([dict(booking) for booking in bookings], columns=BOOKING_PAGE_COLUMNS).rename(columns={
+                "id": "ID", "user_id": "User ID", "car_id": "Car ID", "service_type": "Service Type",
+                "appointment_date": "Appointment Date", "time_slot": "Time Slot", "status": "Status"})
+
+            # Booking Status Pie Chart
+            status_counts = pd.DataFrame(status_rows, columns=["Status", "Count"])
+            fig_status = px.pie(status_counts, names="Status", values="Count", title="Booking Status Distribution", 
+                                color_discrete_sequence=px.colors.sequential.RdBu, template="plotly_dark")
+
+            # Service Type Bar Chart
+            service_counts = pd.DataFrame(service_rows, columns=["Service Type", "Count"])
+            fig_services = px.bar(service_counts, x="Service Type", y="Count", title="Most Requested Services", 
+                                  color="Count", color_continuous_scale="viridis", template="plotly_dark")
+
+            # Display charts side by side
+            col1, col2 = st.columns(2)
+            with span("render.charts"):
+                with col1:
+                    st.plotly_chart(fig_status, use_container_width=True)
+                with col2:
+                    st.plotly_chart(fig_services, use_container_width=True)
+
+            # Booking Trends (read from the daily rollups, so the cost grows with days, not bookings)
+            st.subheader("📈 Booking Trends")
+            trend_col1, trend_col2 = st.columns(2)
+            with trend_col1:
+                trend_days = st.selectbox("Period", [30, 90, 365], format_func=lambda days: f"Last {days} days", key="trend_days")
+            with trend_col2:
+                trend_period = st.radio("Group by", ["day", "week"], format_func=str.title, horizontal=True, key="trend_period")
+            trend_from = date.today() - timedelta(days=trend_days)
+            with db_connection() as conn:
+                # Bookings by appointment date, including the next 30 days of scheduled work
+                trend_rows = get_booking_trend(conn, trend_from, date.today() + timedelta(days=30), trend_period)
+                latency_rows = get_approval_latency(conn, trend_from, date.today(), trend_period)
+
+            trend_col1, trend_col2 = st.columns(2)
+            with span("render.trends"):
+                with trend_col1:
+                    if trend_rows:
+                        trend_df = pd.DataFrame(trend_rows, columns=["Period", "Status", "Bookings"])
+                        st.plotly_chart(px.bar(trend_df, x="Period", y="Bookings", color="Status",
+                                               title=f"Bookings per {trend_period} (appointment date)", template="plotly_dark"),
+                                        use_container_width=True)
+                    else:
+                        st.info("No bookings in this period.")
+                with trend_col2:
+                    if latency_rows:
+                        latency_df = pd.DataFrame(latency_rows, columns=["Period", "Decisions", "Average Hours"])
+                        st.plotly_chart(px.line(latency_df, x="Period", y="Average Hours", markers=True, hover_data=["Decisions"],
+                                                title="Approval latency (booking to decision)", template="plotly_dark"),
+                                        use_container_width=True)
+                    else:
+                        st.info("No approvals or rejections in this period.")
+
+            # Dark Table Styling
+            st.markdown("""
+            <style>
+                .dark-table {
+                    background-color: #1B3A5C;
+                    color: #ffffff;
+                    border-radius: 8px;
+                    padding: 10px;
+                    border: 1px solid #48CAE4;
+                    text-align: center;
+                }
+                .dark-table th {
+                    background-color: #2C3E50;
+                    padding: 8px;
+                }
+                .dark-table td {
+                    padding: 8px;
+                    border-bottom: 1px solid #48CAE4;
+                }
+                .dark-table tr:nth-child(even) {
+                    background-color: #34495E;
+                }
+            </style>
+            """, unsafe_allow_html=True)
+
+            # Convert table to HTML with custom styling
+            with span("render.bookings_table"):
+                table_html = bookings_df.to_html(classes="dark-table", index=False, escape=False)
+            page_number = len(st.session_state.admin_page_cursors)
+            st.markdown(f"### 📋 All Bookings Overview (page {page_number})", unsafe_allow_html=True)
+            st.markdown(table_html, unsafe_allow_html=True)
+
+            # Page navigation
+            prev_col, next_col = st.columns(2)
+            with prev_col:
+                if st.button("⬅️ Newer", disabled=page_number == 1):
+                    st.session_state.admin_page_cursors.pop()
+                    st.rerun()
+            with next_col:
+                if st.button("Older ➡️", disabled=not has_next_page):
+                    st.session_state.admin_page_cursors.append(bookings[-1]["id"])
+                    st.rerun()
+
+            # Bulk approve / reject: one UPDATE in one transaction, then a single rerun
+            st.markdown("## 🗂️ Bulk Actions")
+            if "admin_bulk_result" in st.session_state:
+                st.success(st.session_state.pop("admin_bulk_result"))
+            with st.form("bulk_status_form"):
+                bulk_action = st.radio("Action", ["Approve", "Reject"], horizontal=True)
+                bulk_mode = st.radio("Select bookings by", ["Filter", "Booking IDs"], horizontal=True)
+                filter_col1, filter_col2, filter_col3 = st.columns(3)
+                with filter_col1:
+                    bulk_dates = st.date_input("Appointment date range", value=())
+                with filter_col2:
+                    bulk_services = st.multiselect("Service Type", SERVICE_TYPES)
+                with filter_col3:
+                    bulk_status = st.selectbox("Current Status", ["Pending", "Any", "Approved", "Rejected"])
+                st.caption("Selecting by filter needs an appointment date range or a service type; "
+                           "the current status only narrows the selection further.")
+                bulk_ids = st.multiselect("Booking IDs", [booking["id"] for booking in bookings])
+                bulk_submit = st.form_submit_button("Apply")
+
+            if bulk_submit:
+                new_status = "Approved" if bulk_action == "Approve" else "Rejected"
+                try:
+                    with db_connection() as conn:
+                        if bulk_mode == "Booking IDs":
+                            affected = set_booking_status_by_ids(conn, bulk_ids, new_status)
+                        else:
+                            date_from = bulk_dates[0] if len(bulk_dates) > 0 else None
+                            date_to = bulk_dates[1] if len(bulk_dates) > 1 else date_from
+                            affected = set_booking_status_by_filter(
+                                conn, new_status, date_from=date_from, date_to=date_to, service_types=bulk_services,
+                                current_status=None if bulk_status == "Any" else bulk_status)
+                    # The owners of selected bookings are known; a filter can touch anyone's
+                    if bulk_mode == "Booking IDs":
+                        invalidate_user(*{booking["user_id"] for booking in bookings if booking["id"] in bulk_ids})
+                    else:
+                        invalidate_all()
+                    st.session_state.admin_bulk_result = f"✅ {affected} booking(s) marked as {new_status}."
+                    st.rerun()
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+
+            # Slot capacity: bookings accepted per date and time slot
+            st.markdown("## 🕒 Slot Capacity")
+            with st.form("slot_capacity_form"):
+                cap_col1, cap_col2, cap_col3 = st.columns(3)
+                with cap_col1:
+                    capacity_date = st.date_input("Date", key="capacity_date")
+                with cap_col2:
+                    capacity_slot = st.selectbox("Time Slot", TIME_SLOTS, key="capacity_slot")
+                with cap_col3:
+                    capacity = st.number_input("Capacity", min_value=0, value=SLOT_CAPACITY, step=1)
+                capacity_submit = st.form_submit_button("Set Capacity")
+            if capacity_submit:
+                with db_connection() as conn:
+                    set_slot_capacity(conn, capacity_date.strftime("%Y-%m-%d"), capacity_slot, int(capacity))
+                st.success(f"✅ {capacity_slot} on {capacity_date.strftime('%Y-%m-%d')} now takes {int(capacity)} booking(s).")
+
+            # Fleet view: cars whose stored recommendation is a given service (one indexed query)
+            st.markdown("## 🚗 Fleet Recommendations")
+            model_version = inference.model_version()
+            with db_connection() as conn:
+                recommendation_counts = get_recommendation_counts(conn, model_version)
+            if recommendation_counts:
+                counts = {row["recommendation"]: row["count"] for row in recommendation_counts}
+                fleet_service = st.selectbox("Cars needing", list(counts), format_func=lambda service: f"{service} ({counts[service]})")
+                with db_connection() as conn:
+                    fleet_cars = cars_needing(conn, fleet_service, model_version)
+                st.dataframe(pd.DataFrame([dict(car) for car in fleet_cars]), use_container_width=True, hide_index=True)
+            else:
+                st.info("No stored recommendations yet. Run `python recommendations.py refresh` to compute them.")
+
+            # Display bookings in a card layout with Dark Mode
+            st.markdown("## 📌 Recent Bookings")
+            for booking in bookings:
+                st.markdown(f"""
+                <div style="background-color: #2C3E50; border-radius: 10px; padding: 15px; margin: 10px 0; border-left: 6px solid #48CAE4;">
+                    <h4 style="color: #48CAE4;">📍 Booking ID: {booking['ID']}</h4>
+                    <p style="color: #ffffff;"><b>👤 User ID:</b> {booking['user_iD']}</p>
+                    <p style="color: #ffffff;"><b>🚗 Service:</b> {booking['service_type']}</p>
+                    <p style="color: #ffffff;"><b>📅 Date:</b> {booking['appointment_date']}</p>
+                    <p style="color: #ffffff;"><b>⏰ Time Slot:</b> {booking['time_slot']}</p>
+                    <p><b>📌 Status:</b> <span style="color: {'#f39c12' if booking['status'] == 'Pending' else '#27ae60'};">{booking['status']}</span></p>
+                    <button style="background-color: #4CAF50; color: white; padding: 10px 20px; border: none; border-radius: 5px; font-size: 14px; cursor: pointer;">
+                        ✅ Approve {booking['ID']}
+                    </button>
+                </div>
+                """, unsafe_allow_html=True)
+
+            # Booking approval logic
+            for booking in bookings:
+                if st.button(f"✅ Approve {booking['ID']}"):
+                    with db_connection() as conn:
+                        conn.execute("UPDATE bookings SET Status = 'Approved' WHERE ID = ?", (booking['ID'],))
+                    invalidate_user(booking['user_id'])
+                    st.success(f"✅ Booking {booking['ID']} approved!")
+                    st.rerun()  # Refresh page
+
+            # FAQ knowledge base editor: the chatbot picks up changes without a restart
+            with st.expander("💬 FAQ Knowledge Base"):
+                from faq_store import add_entry, update_entry, delete_entry, search_entries
+
+                faq_search = st.text_input("Search entries", key="faq_search")
+                with db_connection() as conn:
+                    faq_rows = search_entries(conn, faq_search)
+                faq_options = {row["id"]: row for row in faq_rows}
+                selected_entry_id = st.selectbox(
+                    "Entry", [None] + list(faq_options),
+                    format_func=lambda entry_id: "➕ New entry" if entry_id is None else f"#{entry_id} {faq_options[entry_id]['question']}")
+                selected_entry = faq_options.get(selected_entry_id)
+                with st.form("faq_entry_form"):
+                    faq_question = st.text_input("Question", value=selected_entry["question"] if selected_entry else "")
+                    faq_answer = st.text_area("Answer", value=selected_entry["answer"] if selected_entry else "")
+                    save_col, delete_col = st.columns(2)
+                    with save_col:
+                        faq_save = st.form_submit_button("Save")
+                    with delete_col:
+                        faq_delete = st.form_submit_button("Delete", disabled=selected_entry is None)
+
+                if faq_save and (not faq_question.strip() or not faq_answer.strip()):
+                    st.error("❌ Please fill in both the question and the answer!")
+                elif faq_save or faq_delete:
+                    with db_connection() as conn:
+                        if faq_delete:
+                            delete_entry(conn, selected_entry_id)
+                        elif selected_entry is None:
+                            add_entry(conn, faq_question.strip(), faq_answer.strip())
+                        else:
+                            update_entry(conn, selected_entry_id, faq_question.strip(), faq_answer.strip())
+                    # Apply the change to this process's index now; other processes follow within seconds
+                    revision = load_faq_index().refresh().revision
+                    st.success(f"✅ FAQ updated (revision {revision}).")
+
+            # Performance debug panel: breakdown of recent reruns across all sessions
+            with st.expander("⏱️ Performance"):
+                traces = recent_traces()
+                if traces:
+                    selected_trace = st.selectbox(
+                        "Rerun", traces,
+                        format_func=lambda trace: f"{trace.name} · {trace.duration * 1e3:.1f} ms · {trace.as_dict()['started_at']}")
+                    trace_record = selected_trace.as_dict(include_profile=True)
+                    query_count = sum(1 for item in trace_record["spans"] if item["name"] == "db.query")
+                    st.write(f"**{trace_record['name']}**: {trace_record['duration_ms']:.1f} ms in total, {query_count} queries")
+                    spans_df = pd.DataFrame(trace_record["spans"], columns=["name", "depth", "start_ms", "duration_ms", "detail"])
+                    spans_df["name"] = ["· " * depth + name for depth, name in zip(spans_df["depth"], spans_df["name"])]
+                    st.dataframe(spans_df.drop(columns="depth").round(3), use_container_width=True, hide_index=True)
+                    if trace_record["profile"]:
+                        st.code(trace_record["profile"])
+                else:
+                    st.info("No reruns recorded yet.")
+                st.write("**Warm-up:** " + (", ".join(f"{name} {status}" for name, status in warmup_status().items()) or "not started"))
+                if st.button("Profile next rerun"):
+                    st.session_state.profile_next_rerun = True
+                    st.rerun()
+                export_col1, export_col2 = st.columns(2)
+                with export_col1:
+                    st.download_button("Prometheus metrics", prometheus_text(), file_name="metrics.prom", mime="text/plain")
+                with export_col2:
+                    st.download_button("Traces (JSON lines)", traces_jsonl(), file_name="traces.jsonl", mime="application/x-ndjson")
+
+    # Chatbot Section
+    elif menu == "Chatbot":
+        chatbot_interface()
+
+# Trace this rerun (an admin can ask for a cProfile of the next one from the debug panel); trace()
+# also finishes it when the page ends early with st.rerun(), st.stop() or an error
+with trace(f"page.{menu}", profile=st.session_state.pop("profile_next_rerun", False)):
+    render_page(menu)
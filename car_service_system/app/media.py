@@ -0,0 +1,60 @@
+import os
+import base64
+import functools
+import mimetypes
+import streamlit as st
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Files in static/ are served by Streamlit (server.enableStaticServing) at app/static/<name>,
+# with HTTP range support and Last-Modified/ETag validation from the static file handler
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+STATIC_URL_PREFIX = "app/static"
+
+# Older Streamlit releases serve static files through a Tornado handler that sends anything not in
+# this list as text/plain with X-Content-Type-Options: nosniff, which browsers refuse to play as
+# video. Newer releases serve every file with its guessed type (video/mp4 for .mp4) and drop the list.
+try:
+    from streamlit.web.server.app_static_file_handler import SAFE_APP_STATIC_FILE_EXTENSIONS
+except ImportError:
+    SAFE_APP_STATIC_FILE_EXTENSIONS = None
+
+# Older locations, still searched so existing deployments keep working
+MEDIA_DIRS = [STATIC_DIR, os.path.join(BASE_DIR, "videos"), os.path.join(BASE_DIR, "images"), BASE_DIR]
+
+def find_media(name):
+    """Return the path of a media file, searching static/ first."""
+    for media_dir in MEDIA_DIRS:
+        path = os.path.join(media_dir, name)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"Media file {name} not found in {', '.join(MEDIA_DIRS)}")
+
+def static_serving_enabled():
+    try:
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+def served_with_own_type(path):
+    """True when static serving sends this file with its real Content-Type."""
+    if SAFE_APP_STATIC_FILE_EXTENSIONS is None:
+        return True
+    return os.path.splitext(path)[1] in SAFE_APP_STATIC_FILE_EXTENSIONS
+
+# Fallback when static serving is unavailable: encode once per process and share across sessions
+@functools.lru_cache(maxsize=8)
+def _data_uri(path, mtime_ns):
+    mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    with open(path, "rb") as file:
+        return f"data:{mime_type};base64,{base64.b64encode(file.read()).decode()}"
+
+def media_url(name):
+    """
+    Return a URL for a media file: a static URL when it is in static/ and Streamlit serves it with
+    its real type, otherwise a cached data URI.
+    """
+    path = find_media(name)
+    if static_serving_enabled() and os.path.dirname(path) == STATIC_DIR and served_with_own_type(path):
+        return f"{STATIC_URL_PREFIX}/{name}"
+    return _data_uri(path, os.stat(path).st_mtime_ns)
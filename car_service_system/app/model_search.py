@@ -0,0 +1,146 @@
+"""
+Model selection: cross-validated hyperparameter search over several estimator families.
+
+Each search runs its folds and candidates in a process pool (n_jobs). The best model of
+every family is then profiled for fit time, single-car predict latency, serialized size
+and accuracy, and the most accurate one within the latency budget can be promoted so
+that ai_model.get_model() trains and serves it.
+
+    python model_search.py --n-jobs 4 --cv 5 --latency-budget-ms 2 --promote
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import statistics
+from sklearn.model_selection import GridSearchCV, RandomizedSearchCV, StratifiedKFold
+from ai_model import (DATA_PATH, ARTIFACT_DIR, TRAINING_CONFIG, load_training_data, make_estimator,
+                      promote_config, compute_artifact_key, save_artifact)
+
+# Search spaces per estimator family
+SEARCH_SPACES = {
+    "DecisionTreeClassifier": {
+        "max_depth": [None, 4, 8, 12, 16],
+        "min_samples_leaf": [1, 5, 20],
+    },
+    "RandomForestClassifier": {
+        "n_estimators": [50, 100, 200],
+        "max_depth": [None, 8, 16],
+        "min_samples_leaf": [1, 5],
+    },
+    "GradientBoostingClassifier": {
+        "n_estimators": [50, 100],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [2, 3],
+    },
+    "HistGradientBoostingClassifier": {
+        "max_iter": [100, 200],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [None, 6],
+    },
+}
+
+def measure_predict_latency(model, row, repeat=200):
+    """Median seconds for one single-row predict, the shape of a recommendation request."""
+    model.predict(row)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict(row)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def search_family(name, X, y, cv=5, n_jobs=-1, search="grid", n_iter=10, random_state=0):
+    """Run the search for one family and return its result record with the refitted best model."""
+    estimator = make_estimator({"estimator": name, "params": {}})
+    folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+    if search == "random":
+        searcher = RandomizedSearchCV(estimator, SEARCH_SPACES[name], n_iter=n_iter, cv=folds, n_jobs=n_jobs,
+                                      scoring="accuracy", random_state=random_state)
+    else:
+        searcher = GridSearchCV(estimator, SEARCH_SPACES[name], cv=folds, n_jobs=n_jobs, scoring="accuracy")
+    searcher.fit(X, y)
+
+    model = searcher.best_estimator_
+    return {
+        "estimator": name,
+        "params": searcher.best_params_,
+        "accuracy": float(searcher.best_score_),
+        "accuracy_std": float(searcher.cv_results_["std_test_score"][searcher.best_index_]),
+        "fit_time_s": float(searcher.refit_time_),
+        "predict_latency_s": measure_predict_latency(model, X.iloc[[0]]),
+        "model_size_bytes": len(pickle.dumps(model)),
+        "model": model,
+    }
+
+def choose_winner(results, latency_budget_s=None):
+    """Most accurate candidate within the latency budget; faster wins ties. None if nothing qualifies."""
+    eligible = [result for result in results
+                if latency_budget_s is None or result["predict_latency_s"] <= latency_budget_s]
+    if not eligible:
+        return None
+    return max(eligible, key=lambda result: (result["accuracy"], -result["predict_latency_s"]))
+
+def run_model_search(data_path=DATA_PATH, families=None, cv=5, n_jobs=-1, search="grid", n_iter=10,
+                     latency_budget_s=None):
+    """
+    Search every family and return (results, winner, label_encoders); the winner is None if none
+    meets the budget, and label_encoders are the ones the candidates were trained with (for promote()).
+    """
+    X, y, label_encoders = load_training_data(data_path, TRAINING_CONFIG)
+    results = [search_family(name, X, y, cv=cv, n_jobs=n_jobs, search=search, n_iter=n_iter)
+               for name in (families or SEARCH_SPACES)]
+    return results, choose_winner(results, latency_budget_s), label_encoders
+
+def promote(winner, label_encoders, data_path=DATA_PATH):
+    """Store the winner under the registry key of its config and make that config the active one."""
+    config = promote_config(winner["estimator"], winner["params"])
+    key = compute_artifact_key(data_path, config)
+    save_artifact(winner["model"], label_encoders, key, config)
+    return key
+
+def write_report(results, winner, path):
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "winner": winner["estimator"] if winner else None,
+        "candidates": [{k: v for k, v in result.items() if k != "model"} for result in results],
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, default=str)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validated model selection across estimator families.")
+    parser.add_argument("--data", default=DATA_PATH, help="Path to car_maintenance.csv")
+    parser.add_argument("--families", nargs="+", choices=list(SEARCH_SPACES), help="Estimator families to search")
+    parser.add_argument("--cv", type=int, default=5, help="Number of cross-validation folds")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes per search (-1 = all cores)")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid", help="Search strategy")
+    parser.add_argument("--n-iter", type=int, default=10, help="Candidates per family for random search")
+    parser.add_argument("--latency-budget-ms", type=float, help="Max median single-car predict latency")
+    parser.add_argument("--promote", action="store_true", help="Promote the winner so get_model() serves it")
+    parser.add_argument("--report", default=os.path.join(ARTIFACT_DIR, "model_search_report.json"),
+                        help="Where to write the JSON report")
+    args = parser.parse_args(argv)
+
+    budget = args.latency_budget_ms / 1000 if args.latency_budget_ms is not None else None
+    results, winner, label_encoders = run_model_search(args.data, args.families, args.cv, args.n_jobs,
+                                                       args.search, args.n_iter, budget)
+    for result in sorted(results, key=lambda result: -result["accuracy"]):
+        print(f"{result['estimator']:32s} acc={result['accuracy']:.4f}±{result['accuracy_std']:.4f} "
+              f"fit={result['fit_time_s']:.2f}s predict={result['predict_latency_s'] * 1e3:.3f}ms "
+              f"size={result['model_size_bytes'] / 1024:.0f}KiB params={result['params']}")
+    write_report(results, winner, args.report)
+
+    if winner is None:
+        print("No candidate meets the latency budget; nothing promoted.")
+        return 1
+    print(f"Winner: {winner['estimator']} {winner['params']}")
+    if args.promote:
+        print(f"Promoted artifact {promote(winner, label_encoders, args.data)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
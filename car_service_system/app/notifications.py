@@ -1,10 +1,265 @@
+import os
+import time
 import smtplib
+import threading
+from collections import deque
+from database import get_db_connection, db_connection
 
-def send_email(to, subject, body):
-    sender = "your_email@example.com"
-    password = "your_password"
-    message = f"Subject: {subject}\n\n{body}"
-    with smtplib.SMTP("smtp.example.com", 587) as server:
+# SMTP settings (overridable through the environment)
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.example.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", 587))
+SMTP_USER = os.environ.get("SMTP_USER", "your_email@example.com")
+SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD", "your_password")
+SMTP_SENDER = os.environ.get("SMTP_SENDER", SMTP_USER)
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "1") == "1"
+
+# Outbox worker settings
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 50))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 5))
+OUTBOX_BACKOFF_SECONDS = float(os.environ.get("OUTBOX_BACKOFF_SECONDS", 30))
+OUTBOX_RATE_PER_SECOND = float(os.environ.get("OUTBOX_RATE_PER_SECOND", 5))
+OUTBOX_POLL_SECONDS = float(os.environ.get("OUTBOX_POLL_SECONDS", 2))
+OUTBOX_IDLE_DISCONNECT_SECONDS = float(os.environ.get("OUTBOX_IDLE_DISCONNECT_SECONDS", 60))
+# A claimed message whose worker has not recorded a result within this time is handed out again
+OUTBOX_LEASE_SECONDS = float(os.environ.get("OUTBOX_LEASE_SECONDS", 300))
+
+def email_enabled():
+    """True when an SMTP host has been configured for this deployment."""
+    return "SMTP_HOST" in os.environ
+
+def format_message(sender, to, subject, body):
+    return f"From: {sender}\nTo: {to}\nSubject: {subject}\n\n{body}"
+
+def open_smtp_connection():
+    server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30)
+    if SMTP_STARTTLS:
         server.starttls()
-        server.login(sender, password)
-        server.sendmail(sender, to, message)
\ No newline at end of file
+    if SMTP_USER and SMTP_PASSWORD:
+        server.login(SMTP_USER, SMTP_PASSWORD)
+    return server
+
+def send_email(to, subject, body):
+    """Send one message synchronously over a new SMTP connection. Prefer enqueue_email() from request handlers."""
+    server = open_smtp_connection()
+    try:
+        server.sendmail(SMTP_SENDER, to, format_message(SMTP_SENDER, to, subject, body))
+    finally:
+        server.quit()
+
+def enqueue_email(to, subject, body, user_id=None, conn=None):
+    """
+    Write an email to the notifications outbox and return its id.
+    The caller returns immediately; the outbox worker delivers it in the background.
+    Pass `conn` to enqueue inside the caller's own transaction.
+    """
+    sql = '''
+        INSERT INTO notifications (user_id, message, channel, recipient, subject, status, attempts, next_attempt_at)
+        VALUES (?, ?, 'email', ?, ?, 'pending', 0, datetime('now'))
+    '''
+    if conn is not None:
+        return conn.execute(sql, (user_id, body, to, subject)).lastrowid
+    with db_connection() as conn:
+        return conn.execute(sql, (user_id, body, to, subject)).lastrowid
+
+def get_queue_depth(conn):
+    """Number of emails waiting to be delivered (including ones waiting for a retry)."""
+    return conn.execute(
+        "SELECT COUNT(*) FROM notifications WHERE channel = 'email' AND status IN ('pending', 'sending')"
+    ).fetchone()[0]
+
+class OutboxWorker(threading.Thread):
+    """
+    Background thread that drains the email outbox over one persistent SMTP connection.
+    Sends are rate limited; failures are retried with exponential backoff until
+    OUTBOX_MAX_ATTEMPTS, after which the message is marked 'failed'. Claimed messages are
+    leased to one worker (next_attempt_at holds the lease expiry while status is 'sending'),
+    so several processes can drain the same outbox without sending a message twice.
+    """
+
+    def __init__(self, smtp_factory=open_smtp_connection, batch_size=OUTBOX_BATCH_SIZE,
+                 max_attempts=OUTBOX_MAX_ATTEMPTS, backoff_seconds=OUTBOX_BACKOFF_SECONDS,
+                 rate_per_second=OUTBOX_RATE_PER_SECOND, poll_seconds=OUTBOX_POLL_SECONDS,
+                 lease_seconds=OUTBOX_LEASE_SECONDS):
+        super().__init__(name="email-outbox", daemon=True)
+        self.smtp_factory = smtp_factory
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.rate_per_second = rate_per_second
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._server = None
+        self._last_used = 0.0
+        self._next_send_at = 0.0
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._sent_times = deque(maxlen=1000)
+        self._stats_lock = threading.Lock()
+        self.stats = {"sent": 0, "failed": 0, "retried": 0, "connections": 0}
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        self._wake_event.set()
+        self.join(timeout)
+
+    def wake(self):
+        """Ask the worker to poll now instead of waiting for the next interval."""
+        self._wake_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                sent = self.drain_once()
+            except Exception:
+                # A broken connection or database hiccup must not kill the worker
+                self._disconnect()
+                sent = 0
+            if not sent:
+                if self._server is not None and time.monotonic() - self._last_used > OUTBOX_IDLE_DISCONNECT_SECONDS:
+                    self._disconnect()
+                self._wake_event.wait(self.poll_seconds)
+                self._wake_event.clear()
+        self._disconnect()
+
+    def _recover_stuck(self, conn):
+        # Messages whose lease ran out (their worker died or hung mid-batch) go back to the queue;
+        # messages another worker is still sending keep their lease
+        conn.execute('''
+            UPDATE notifications SET status = 'pending'
+            WHERE channel = 'email' AND status = 'sending' AND next_attempt_at <= datetime('now')
+        ''')
+
+    def _claim_batch(self):
+        with db_connection() as conn:
+            # Take the write lock before reading so two workers cannot pick the same rows
+            conn.execute('BEGIN IMMEDIATE')
+            self._recover_stuck(conn)
+            rows = conn.execute('''
+                SELECT id, recipient, subject, message, attempts FROM notifications
+                WHERE channel = 'email' AND status = 'pending' AND next_attempt_at <= datetime('now')
+                ORDER BY next_attempt_at, id LIMIT ?
+            ''', (self.batch_size,)).fetchall()
+            lease = f"+{int(self.lease_seconds)} seconds"
+            claimed = [row for row in rows if conn.execute('''
+                UPDATE notifications SET status = 'sending', next_attempt_at = datetime('now', ?)
+                WHERE id = ? AND status = 'pending'
+            ''', (lease, row["id"])).rowcount == 1]
+        return claimed
+
+    def drain_once(self):
+        """Deliver one batch of due messages; return how many were sent."""
+        rows = self._claim_batch()
+        sent, results = 0, []
+        try:
+            for row in rows:
+                if self._stop_event.is_set():
+                    break
+                self._throttle()
+                try:
+                    server = self._connect()
+                    server.sendmail(SMTP_SENDER, row["recipient"],
+                                    format_message(SMTP_SENDER, row["recipient"], row["subject"], row["message"]))
+                    self._last_used = time.monotonic()
+                    results.append(("sent", row["id"], row["attempts"] + 1, None))
+                    sent += 1
+                except Exception as e:
+                    # Any failure (including e.g. an encoding error) counts as an attempt
+                    if isinstance(e, (smtplib.SMTPException, OSError)):
+                        self._disconnect()
+                    status = "failed" if row["attempts"] + 1 >= self.max_attempts else "pending"
+                    results.append((status, row["id"], row["attempts"] + 1, f"{type(e).__name__}: {e}"))
+        finally:
+            # Hand messages that were not attempted back untouched, then record every outcome
+            done = {result[1] for result in results}
+            results.extend(("pending", row["id"], row["attempts"], None) for row in rows if row["id"] not in done)
+            self._record(results)
+        return sent
+
+    def _record(self, results):
+        with db_connection() as conn:
+            for status, notification_id, attempts, error in results:
+                if status == "sent":
+                    conn.execute('''
+                        UPDATE notifications SET status = 'sent', attempts = ?, sent_at = datetime('now'), last_error = NULL
+                        WHERE id = ?
+                    ''', (attempts, notification_id))
+                elif error is None:
+                    conn.execute("UPDATE notifications SET status = 'pending', next_attempt_at = datetime('now') WHERE id = ?",
+                                 (notification_id,))
+                else:
+                    delay = self.backoff_seconds * (2 ** (attempts - 1))
+                    conn.execute('''
+                        UPDATE notifications SET status = ?, attempts = ?, last_error = ?,
+                            next_attempt_at = datetime('now', ?)
+                        WHERE id = ?
+                    ''', (status, attempts, error, f"+{int(delay)} seconds", notification_id))
+
+        now = time.monotonic()
+        with self._stats_lock:
+            for status, _, _, error in results:
+                if status == "sent":
+                    self.stats["sent"] += 1
+                    self._sent_times.append(now)
+                elif status == "failed":
+                    self.stats["failed"] += 1
+                elif error is not None:
+                    self.stats["retried"] += 1
+
+    def _throttle(self):
+        if self.rate_per_second <= 0:
+            return
+        now = time.monotonic()
+        if now < self._next_send_at:
+            time.sleep(self._next_send_at - now)
+        self._next_send_at = max(now, self._next_send_at) + 1 / self.rate_per_second
+
+    def _connect(self):
+        if self._server is None:
+            self._server = self.smtp_factory()
+            with self._stats_lock:
+                self.stats["connections"] += 1
+        return self._server
+
+    def _disconnect(self):
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+    def metrics(self, window_seconds=60):
+        """Counters plus queue depth and messages/second over the last `window_seconds`."""
+        now = time.monotonic()
+        with self._stats_lock:
+            metrics = dict(self.stats)
+            recent = sum(1 for sent_at in self._sent_times if now - sent_at <= window_seconds)
+        metrics["throughput_per_second"] = recent / window_seconds
+        conn = get_db_connection()
+        try:
+            metrics["queue_depth"] = get_queue_depth(conn)
+        finally:
+            conn.close()
+        return metrics
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def start_worker(**kwargs):
+    """Start the process-wide outbox worker if it is not running yet, and return it."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = OutboxWorker(**kwargs)
+            _worker.start()
+        return _worker
+
+# Run the outbox worker in the foreground: python notifications.py
+if __name__ == "__main__":
+    worker = start_worker()
+    try:
+        while worker.is_alive():
+            time.sleep(10)
+            print(worker.metrics())
+    except KeyboardInterrupt:
+        worker.stop()
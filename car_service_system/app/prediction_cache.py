@@ -0,0 +1,87 @@
+import os
+import numbers
+import threading
+from collections import OrderedDict
+import ai_model
+from fast_inference import recommend_services_fast
+
+# Cache settings (overridable through the environment)
+PREDICTION_CACHE_SIZE = int(os.environ.get("CAR_SERVICE_PREDICTION_CACHE_SIZE", 4096))
+# Round mileage down to multiples of this many miles before predicting; 0 disables bucketing.
+# Bucketing raises the hit rate but means every car in a bucket gets the bucket's prediction.
+MILEAGE_BUCKET = int(os.environ.get("CAR_SERVICE_MILEAGE_BUCKET", 0))
+
+class PredictionCache:
+    """
+    Process-wide LRU cache of recommendations keyed on the normalized
+    (mileage, year, driving_condition) tuple. Entries belong to one model:
+    the cache empties itself when a different model is used or loaded.
+    """
+
+    def __init__(self, maxsize=PREDICTION_CACHE_SIZE, mileage_bucket=MILEAGE_BUCKET):
+        self.maxsize = maxsize
+        self.mileage_bucket = mileage_bucket
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def normalize(self, car_details):
+        """Return (key, car_details used for the prediction), applying mileage bucketing if enabled."""
+        mileage = car_details.get('mileage')
+        if self.mileage_bucket and isinstance(mileage, numbers.Real) and mileage == mileage:
+            mileage = (int(mileage) // self.mileage_bucket) * self.mileage_bucket
+            car_details = dict(car_details, mileage=mileage)
+        # 42000, 42000.0 and numpy scalars predict the same, so they share an entry
+        key = tuple(float(value) if isinstance(value, numbers.Real) and not isinstance(value, bool) else value
+                    for value in (mileage, car_details.get('year'), car_details.get('driving_condition')))
+        return key, car_details
+
+    def invalidate(self, *_):
+        with self._lock:
+            self._entries.clear()
+            self._model = None
+            self.invalidations += 1
+
+    def get_or_compute(self, model, car_details, compute):
+        """Return the cached prediction for car_details, calling compute(car_details) on a miss."""
+        key, car_details = self.normalize(car_details)
+        with self._lock:
+            if self._model is not model:
+                self._entries.clear()
+                self._model = model
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Computed outside the lock; invalid input raises and is never cached
+        result = compute(car_details)
+
+        with self._lock:
+            if self._model is model and self.maxsize > 0:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0, "evictions": self.evictions,
+                    "invalidations": self.invalidations}
+
+prediction_cache = PredictionCache()
+ai_model.add_model_listener(prediction_cache.invalidate)
+
+def cached_recommend(model, label_encoders, car_details):
+    """recommend_services_fast() behind the process-wide prediction cache."""
+    return prediction_cache.get_or_compute(
+        model, car_details, lambda details: recommend_services_fast(model, label_encoders, details))
@@ -0,0 +1,95 @@
+"""
+Materialized per-car recommendations.
+
+Each car's recommendation is stored in car_recommendations together with the model
+version that produced it. Rows are written when a car is added, dropped by a trigger
+when the car's mileage, year or driving condition changes, and treated as stale when
+the model version changes. Reads are indexed lookups, and "which cars need X" is a
+single indexed query instead of one model call per car.
+
+    python recommendations.py refresh   # recompute every missing or stale row
+"""
+import sys
+
+FEATURES = ['mileage', 'year', 'driving_condition']
+
+UPSERT_SQL = '''
+        INSERT INTO car_recommendations (car_id, recommendation, model_version, computed_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (car_id) DO UPDATE SET
+            recommendation = excluded.recommendation,
+            model_version = excluded.model_version,
+            computed_at = excluded.computed_at
+    '''
+
+def upsert_recommendation(conn, car_id, recommendation, model_version):
+    conn.execute(UPSERT_SQL, (car_id, recommendation, model_version))
+
+def recommend_for_car(conn, car, recommend, model_version):
+    """
+    Return the stored recommendation for a cars row, computing it with recommend(car_details)
+    and storing it first if it is missing or was produced by another model version.
+    """
+    row = conn.execute('SELECT recommendation, model_version FROM car_recommendations WHERE car_id = ?',
+                       (car['id'],)).fetchone()
+    if row is not None and row['model_version'] == model_version:
+        return row['recommendation']
+    recommendation = recommend({feature: car[feature] for feature in FEATURES})
+    upsert_recommendation(conn, car['id'], recommendation, model_version)
+    conn.commit()
+    return recommendation
+
+def refresh_recommendations(conn, model, label_encoders, model_version, chunk_size=10000):
+    """Recompute every car whose recommendation is missing or stale, in batches; return how many were written."""
+    import pandas as pd
+    from ai_model import recommend_services_batch
+
+    cars = pd.read_sql_query('''
+        SELECT c.id, c.mileage, c.year, c.driving_condition
+        FROM cars c LEFT JOIN car_recommendations r ON r.car_id = c.id
+        WHERE r.car_id IS NULL OR r.model_version != ?
+    ''', conn, params=(model_version,))
+    written = 0
+    start = 0
+    for labels in recommend_services_batch(model, label_encoders, cars[FEATURES], chunk_size=chunk_size):
+        car_ids = cars['id'].iloc[start:start + len(labels)].tolist()
+        conn.executemany(UPSERT_SQL, [(car_id, str(label), model_version) for car_id, label in zip(car_ids, labels)])
+        conn.commit()
+        start += len(labels)
+        written += len(labels)
+    return written
+
+def get_recommendation_counts(conn, model_version):
+    """Return [(recommendation, count)] for the current model version."""
+    return conn.execute('''
+        SELECT recommendation, COUNT(*) AS count FROM car_recommendations
+        WHERE model_version = ? GROUP BY recommendation ORDER BY count DESC
+    ''', (model_version,)).fetchall()
+
+def cars_needing(conn, recommendation, model_version, limit=100):
+    """Cars whose current recommendation is the given service, via the (model_version, recommendation) index."""
+    return conn.execute('''
+        SELECT c.* FROM car_recommendations r JOIN cars c ON c.id = r.car_id
+        WHERE r.model_version = ? AND r.recommendation = ?
+        ORDER BY r.car_id LIMIT ?
+    ''', (model_version, recommendation, limit)).fetchall()
+
+def main(argv=None):
+    from database import get_db_connection
+    from ai_model import get_model, get_model_version
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv != ["refresh"]:
+        print("usage: python recommendations.py refresh")
+        return 2
+    model, label_encoders = get_model()
+    conn = get_db_connection()
+    try:
+        written = refresh_recommendations(conn, model, label_encoders, get_model_version())
+    finally:
+        conn.close()
+    print(f"Refreshed {written} car recommendations for model {get_model_version()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
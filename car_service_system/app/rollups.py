@@ -0,0 +1,97 @@
+"""
+Booking analytics rollups.
+
+booking_daily_counts holds one row per appointment day, status, service type and time
+slot; booking_decision_daily holds, per day, how many bookings were first approved or
+rejected and how long they had waited. Triggers on bookings keep both current, so the
+dashboard charts read O(days) rows instead of aggregating every booking.
+
+    python rollups.py backfill   # rebuild both rollups from the bookings table
+    python rollups.py check      # compare the rollups with a live aggregate
+"""
+import sys
+import argparse
+from database import get_db_connection, db_connection, init_db
+
+# Period start for each trend granularity ("week" starts on Monday)
+PERIODS = {
+    "day": "day",
+    "week": "date(day, '-6 days', 'weekday 1')",
+}
+
+def rebuild_rollups(conn):
+    """Recompute both rollups from bookings; return (count rows, decision rows) written."""
+    conn.execute('DELETE FROM booking_daily_counts')
+    conn.execute('DELETE FROM booking_decision_daily')
+    counts = conn.execute('''
+        INSERT INTO booking_daily_counts (day, status, service_type, time_slot, bookings)
+        SELECT appointment_date, COALESCE(status, ''), service_type, time_slot, COUNT(*)
+        FROM bookings GROUP BY appointment_date, COALESCE(status, ''), service_type, time_slot
+    ''').rowcount
+    decisions = conn.execute('''
+        INSERT INTO booking_decision_daily (day, status, decisions, timed_decisions, latency_seconds)
+        SELECT date(decided_at), status, COUNT(*), COUNT(created_at),
+               COALESCE(SUM((julianday(decided_at) - julianday(created_at)) * 86400), 0)
+        FROM bookings WHERE decided_at IS NOT NULL GROUP BY date(decided_at), status
+    ''').rowcount
+    return counts, decisions
+
+def check_rollups(conn):
+    """Return [(day, status, service_type, time_slot, rollup, actual)] for every count that disagrees."""
+    return conn.execute('''
+        WITH actual AS (
+            SELECT appointment_date AS day, COALESCE(status, '') AS status, service_type, time_slot,
+                   COUNT(*) AS bookings
+            FROM bookings GROUP BY 1, 2, 3, 4
+        )
+        SELECT a.day, a.status, a.service_type, a.time_slot, COALESCE(r.bookings, 0), a.bookings
+        FROM actual a LEFT JOIN booking_daily_counts r USING (day, status, service_type, time_slot)
+        WHERE r.bookings IS NOT a.bookings
+        UNION ALL
+        SELECT r.day, r.status, r.service_type, r.time_slot, r.bookings, 0
+        FROM booking_daily_counts r LEFT JOIN actual a USING (day, status, service_type, time_slot)
+        WHERE a.bookings IS NULL AND r.bookings != 0
+    ''').fetchall()
+
+def get_booking_trend(conn, date_from, date_to, period="day"):
+    """Return [(period start, status, bookings)] for appointment days in [date_from, date_to]."""
+    key = PERIODS[period]
+    return conn.execute(f'''
+        SELECT {key} AS period, status, SUM(bookings) AS total FROM booking_daily_counts
+        WHERE day BETWEEN ? AND ? GROUP BY period, status HAVING SUM(bookings) > 0 ORDER BY period
+    ''', (str(date_from), str(date_to))).fetchall()
+
+def get_approval_latency(conn, date_from, date_to, period="day"):
+    """Return [(period start, decisions, average hours from booking to decision)] for decision days in range."""
+    key = PERIODS[period]
+    return conn.execute(f'''
+        SELECT {key} AS period, SUM(decisions) AS decisions,
+               SUM(latency_seconds) / NULLIF(SUM(timed_decisions), 0) / 3600.0 AS avg_hours
+        FROM booking_decision_daily WHERE day BETWEEN ? AND ? GROUP BY period ORDER BY period
+    ''', (str(date_from), str(date_to))).fetchall()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the booking analytics rollups.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("backfill", help="Rebuild the rollups from the bookings table")
+    subparsers.add_parser("check", help="Report rollup counts that disagree with the bookings table")
+
+    args = parser.parse_args(argv)
+    init_db()
+    if args.command == "backfill":
+        with db_connection() as conn:
+            counts, decisions = rebuild_rollups(conn)
+        print(f"Wrote {counts} daily count rows and {decisions} decision rows")
+        return 0
+    conn = get_db_connection()
+    try:
+        mismatches = check_rollups(conn)
+    finally:
+        conn.close()
+    for day, status, service_type, time_slot, rollup, actual in mismatches:
+        print(f"{day} {status or '-'} {service_type} {time_slot}: rollup {rollup}, bookings {actual}")
+    print(f"{len(mismatches)} mismatched rollup rows" if mismatches else "Rollups match the bookings table")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import datetime
+from database import SLOT_CAPACITY
+
+# Bookable time slots, in the order they happen during the day
+TIME_SLOTS = ["Morning", "Afternoon", "Evening"]
+
+# How far ahead next_free_slots() looks
+SLOT_SEARCH_DAYS = 90
+
+def reserve_slot(conn, slot_date, time_slot, bay=''):
+    """
+    Take one place in a slot if it has capacity left; return True on success.
+    The check and the increment are one conditional UPDATE, so concurrent sessions
+    cannot overbook. Call it in the transaction that inserts the booking.
+    """
+    if time_slot not in TIME_SLOTS:
+        raise ValueError(f"Unknown time slot: {time_slot}")
+    slot_date = str(slot_date)
+    conn.execute('''
+        INSERT OR IGNORE INTO slot_inventory (slot_date, time_slot, bay, capacity, reserved)
+        VALUES (?, ?, ?, ?, 0)
+    ''', (slot_date, time_slot, bay, SLOT_CAPACITY))
+    cursor = conn.execute('''
+        UPDATE slot_inventory SET reserved = reserved + 1
+        WHERE slot_date = ? AND time_slot = ? AND bay = ? AND reserved < capacity
+    ''', (slot_date, time_slot, bay))
+    return cursor.rowcount == 1
+
+def set_slot_capacity(conn, slot_date, time_slot, capacity, bay=''):
+    """Set the capacity of one slot. Existing reservations are kept even if they exceed it."""
+    if capacity < 0:
+        raise ValueError("Capacity cannot be negative.")
+    conn.execute('''
+        INSERT INTO slot_inventory (slot_date, time_slot, bay, capacity, reserved)
+        VALUES (?, ?, ?, ?, 0)
+        ON CONFLICT (slot_date, time_slot, bay) DO UPDATE SET capacity = excluded.capacity
+    ''', (str(slot_date), time_slot, bay, capacity))
+
+def get_slot_availability(conn, slot_date, bay=''):
+    """Return {time_slot: free places} for one date."""
+    rows = conn.execute('SELECT time_slot, capacity - reserved AS free FROM slot_inventory WHERE slot_date = ? AND bay = ?',
+                        (str(slot_date), bay)).fetchall()
+    free = {row['time_slot']: max(row['free'], 0) for row in rows}
+    return {time_slot: free.get(time_slot, SLOT_CAPACITY) for time_slot in TIME_SLOTS}
+
+def next_free_slots(conn, from_date=None, limit=5, bay='', days=SLOT_SEARCH_DAYS):
+    """
+    Return up to `limit` (slot_date, time_slot, free) rows with capacity left, earliest first.
+    Dates and slots are generated in SQL and each one is a primary-key lookup in slot_inventory,
+    so the cost depends on how far ahead the first free slots are, not on the number of bookings.
+    """
+    from_date = from_date or datetime.date.today()
+    slot_values = ', '.join(f"({rank}, ?)" for rank in range(len(TIME_SLOTS)))
+    return conn.execute(f'''
+        WITH RECURSIVE days(day) AS (
+            SELECT date(?)
+            UNION ALL
+            SELECT date(day, '+1 day') FROM days WHERE day < date(?, ?)
+        ),
+        slots(rank, time_slot) AS (VALUES {slot_values})
+        SELECT days.day AS slot_date, slots.time_slot,
+               COALESCE(i.capacity, ?) - COALESCE(i.reserved, 0) AS free
+        FROM days CROSS JOIN slots
+        LEFT JOIN slot_inventory i ON i.slot_date = days.day AND i.time_slot = slots.time_slot AND i.bay = ?
+        WHERE free > 0
+        ORDER BY days.day, slots.rank
+        LIMIT ?
+    ''', [str(from_date), str(from_date), f'+{int(days) - 1} days', *TIME_SLOTS, SLOT_CAPACITY, bay, limit]).fetchall()
@@ -0,0 +1,62 @@
+import os
+import threading
+import streamlit as st
+from database import get_db_connection
+
+# Number of (user, version) results kept per query
+USER_CACHE_SIZE = int(os.environ.get("CAR_SERVICE_USER_CACHE_SIZE", 1024))
+
+# Data versions: every write path that changes a user's rows bumps that user's counter,
+# and writes that touch an unknown set of users (bulk admin updates) bump the global one.
+# Cached reads are keyed on both, so a bump makes the next read go to the database.
+_versions = {}
+_global_version = 0
+_versions_lock = threading.Lock()
+
+def data_version(user_id):
+    return _global_version, _versions.get(user_id, 0)
+
+def invalidate_user(*user_ids):
+    """Call after a write that changes these users' profile, cars or bookings."""
+    with _versions_lock:
+        for user_id in user_ids:
+            _versions[user_id] = _versions.get(user_id, 0) + 1
+
+def invalidate_all():
+    """Call after a write whose affected users are not known, e.g. a filtered bulk update."""
+    global _global_version
+    with _versions_lock:
+        _global_version += 1
+
+# Rows are returned as dicts: st.cache_data pickles results and sqlite3.Row cannot be pickled
+def _fetch(sql, params, one=False):
+    conn = get_db_connection()
+    try:
+        cursor = conn.execute(sql, params)
+        if one:
+            row = cursor.fetchone()
+            return dict(row) if row is not None else None
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+@st.cache_data(max_entries=USER_CACHE_SIZE, show_spinner=False)
+def _load_user(user_id, version):
+    return _fetch('SELECT * FROM users WHERE id = ?', (user_id,), one=True)
+
+@st.cache_data(max_entries=USER_CACHE_SIZE, show_spinner=False)
+def _load_user_cars(user_id, version):
+    return _fetch('SELECT * FROM cars WHERE user_id = ?', (user_id,))
+
+@st.cache_data(max_entries=USER_CACHE_SIZE, show_spinner=False)
+def _load_user_bookings(user_id, version):
+    return _fetch('SELECT * FROM bookings WHERE user_id = ?', (user_id,))
+
+def get_user(user_id):
+    return _load_user(user_id, data_version(user_id))
+
+def get_user_cars(user_id):
+    return _load_user_cars(user_id, data_version(user_id))
+
+def get_user_bookings(user_id):
+    return _load_user_bookings(user_id, data_version(user_id))
@@ -0,0 +1,50 @@
+import threading
+from instrumentation import span
+
+# Process-wide results of slow loaders, started in the background at startup
+_tasks = {}
+_tasks_lock = threading.Lock()
+
+class _Task:
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"warmup-{name}", daemon=True)
+
+    def _run(self):
+        try:
+            with span(f"warmup.{self.name}"):
+                self.result = self.loader()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+def warm(name, loader):
+    """Start loader() in a background thread unless `name` is already warming or warm."""
+    with _tasks_lock:
+        if name in _tasks:
+            return
+        task = _tasks[name] = _Task(name, loader)
+    task.thread.start()
+
+def warmed(name, loader):
+    """
+    Return the result of the warm-up task `name`, waiting for it if it is still running.
+    If it was never started or it failed, loader() runs here instead (and a failure is raised).
+    """
+    task = _tasks.get(name)
+    if task is not None:
+        task.done.wait()
+        if task.error is None:
+            return task.result
+    return loader()
+
+def warmup_status():
+    """{name: "warming" | "ready" | "failed: ..."} for the debug panel."""
+    return {name: ("warming" if not task.done.is_set() else
+                   "ready" if task.error is None else f"failed: {task.error}")
+            for name, task in list(_tasks.items())}
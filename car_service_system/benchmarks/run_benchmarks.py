@@ -0,0 +1,269 @@
+"""
+Benchmark harness for training, inference, chatbot lookup and page queries.
+
+Generates synthetic datasets at each requested size, times the hot paths of the
+app and writes machine-readable results that can be compared against a baseline:
+
+    python run_benchmarks.py --sizes 1000,100000 --output results.json
+    python run_benchmarks.py --baseline results.json --max-regression 1.25
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+import statistics
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+import numpy as np
+import pandas as pd
+import ai_model
+import database
+import slots
+import rollups
+from faq_index import FaqIndex
+
+MAKES = {"Toyota": ["Corolla", "Camry", "RAV4"], "Honda": ["Civic", "Accord", "CR-V"],
+         "Ford": ["Focus", "F-150", "Escape"], "BMW": ["3 Series", "X3", "X5"]}
+ENGINE_TYPES = ["Gasoline", "Diesel", "Hybrid", "Electric"]
+DRIVING_CONDITIONS = ["Fair", "Good", "Excellent"]
+MAINTENANCE_LABELS = ["Oil Change", "Tire Rotation", "Battery Check", "Brake Inspection", "Full Service"]
+TIME_SLOTS = ["Morning", "Afternoon", "Evening"]
+STATUSES = ["Pending", "Approved", "Rejected"]
+FAQ_WORDS = ("oil brake tire battery engine service change warranty price booking appointment filter "
+             "coolant transmission inspection alignment wiper light noise vibration mileage").split()
+# Modules main.py imports before the first page renders (keep in sync with its top-level imports)
+STARTUP_IMPORTS = ["streamlit", "instrumentation", "database", "inference_client", "slots", "user_data",
+                   "recommendations", "media", "notifications", "warmup", "chat_history", "rollups"]
+# Heavy modules that main.py only imports inside the pages or background tasks that need them
+PAGE_IMPORTS = ["pandas", "plotly.express", "ai_model", "faq_index"]
+
+def parse_size(text):
+    text = text.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+def measure(fn, repeat=5, number=1):
+    """Run fn `number` times per sample, `repeat` samples; return per-call timing stats in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return summarize(samples, number)
+
+def summarize(samples, number=1):
+    samples = sorted(samples)
+    repeat = len(samples)
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": samples[0],
+        "p95_s": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "repeat": repeat,
+        "number": number,
+    }
+
+# Synthetic data
+def make_maintenance_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    makes = rng.choice(list(MAKES), n_rows)
+    models = np.array([MAKES[make][i] for make, i in zip(makes, rng.integers(0, 3, n_rows))])
+    return pd.DataFrame({
+        "make": makes,
+        "model": models,
+        "year": rng.integers(1995, 2025, n_rows),
+        "mileage": rng.integers(0, 300000, n_rows),
+        "engine_type": rng.choice(ENGINE_TYPES, n_rows),
+        "driving_condition": rng.choice(DRIVING_CONDITIONS, n_rows),
+        "maintenance_labels": rng.choice(MAINTENANCE_LABELS, n_rows),
+    })
+
+def write_maintenance_csv(n_rows, directory, seed=0):
+    path = os.path.join(directory, f"car_maintenance_{n_rows}.csv")
+    make_maintenance_frame(n_rows, seed).to_csv(path, index=False, encoding="ISO-8859-1")
+    return path
+
+def make_faq_corpus(n_entries, seed=0):
+    rng = random.Random(seed)
+    return [{"question": " ".join(rng.choices(FAQ_WORDS, k=rng.randint(4, 10))) + "?",
+             "answer": f"Answer {i}"} for i in range(n_entries)]
+
+def populate_database(n_rows, seed=0):
+    """Fill the current database.DB_PATH with n_rows users, cars and bookings."""
+    rng = random.Random(seed)
+    database.init_db()
+    with database.db_connection() as conn:
+        conn.executemany("INSERT INTO users (name, email, phone, password) VALUES (?, ?, ?, ?)",
+                         ((f"User {i}", f"user{i}@example.com", "0000000000", f"pw{i}") for i in range(n_rows)))
+        conn.executemany('''
+            INSERT INTO cars (user_id, make, model, year, mileage, engine_type, driving_condition)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', ((rng.randint(1, n_rows), make, MAKES[make][0], rng.randint(1995, 2024), rng.randint(0, 300000),
+               rng.choice(ENGINE_TYPES), rng.choice(DRIVING_CONDITIONS))
+              for make in (rng.choice(list(MAKES)) for _ in range(n_rows))))
+        conn.executemany('''
+            INSERT INTO bookings (user_id, car_id, service_type, appointment_date, time_slot, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', ((rng.randint(1, n_rows), rng.randint(1, n_rows), rng.choice(MAINTENANCE_LABELS),
+               f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", rng.choice(TIME_SLOTS), rng.choice(STATUSES))
+              for _ in range(n_rows)))
+
+def import_time(modules):
+    """Seconds to import `modules` in a fresh interpreter, summed from python -X importtime."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+                               cwd=APP_DIR, capture_output=True, text=True, check=True)
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        parts = line.split("|")
+        # "import time: self [us] | cumulative | name"; nested imports are indented under their parent
+        if len(parts) != 3 or not parts[1].strip().isdigit() or parts[2][1:2] == " ":
+            continue
+        total_us += int(parts[1])
+    return total_us / 1e6
+
+# Benchmarks
+def bench_startup(results, repeat=3):
+    results["import_startup"] = summarize([import_time(STARTUP_IMPORTS) for _ in range(repeat)])
+    for module in PAGE_IMPORTS:
+        results[f"import[{module}]"] = summarize([import_time([module]) for _ in range(repeat)])
+
+def bench_model(n_rows, workdir, results):
+    csv_path = write_maintenance_csv(n_rows, workdir)
+    # Cold: parse the CSV on every call. Cached: read the columnar training cache, which is built
+    # under workdir so the benchmark never writes into the app's models/ directory
+    cold_config = dict(ai_model.TRAINING_CONFIG, training_cache=False)
+    results[f"train_model[{n_rows}]"] = measure(lambda: ai_model.train_model(csv_path, cold_config), repeat=3)
+    ai_model.TRAINING_CACHE_DIR = os.path.join(workdir, "training_cache")
+    ai_model.build_training_cache(csv_path)
+    results[f"train_model_cached[{n_rows}]"] = measure(lambda: ai_model.train_model(csv_path), repeat=3)
+
+    model, label_encoders = ai_model.train_model(csv_path)
+    car = {"mileage": 42000, "year": 2018, "driving_condition": "Good"}
+    results[f"recommend_single[{n_rows}]"] = measure(
+        lambda: ai_model.recommend_services(model, label_encoders, car), repeat=7, number=200)
+
+    cars = make_maintenance_frame(n_rows, seed=1)[["mileage", "year", "driving_condition"]]
+    batch = measure(lambda: list(ai_model.recommend_services_batch(model, label_encoders, cars)), repeat=3)
+    batch["per_row_s"] = batch["median_s"] / n_rows
+    results[f"recommend_batch[{n_rows}]"] = batch
+
+def bench_faq(corpus_name, faq_data, results):
+    results[f"faq_build[{corpus_name}]"] = measure(lambda: FaqIndex(faq_data), repeat=3)
+    index = FaqIndex(faq_data)
+    query = "how often should I change my engine oil"
+    results[f"faq_match[{corpus_name}]"] = measure(lambda: index.best_answer(query), repeat=7, number=50)
+    # One edited entry applied to the live index (a full refit only for small corpora)
+    change = [{"id": -1, "question": "how do I book a brake inspection online", "answer": "Answer", "deleted": 0}]
+    results[f"faq_update[{corpus_name}]"] = measure(lambda: index.with_changes(change, 1), repeat=7, number=20)
+
+def check_admin_dashboard(timeout=300):
+    """Render the Admin Dashboard against the current database (migrated schema); raise if the page fails."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(APP_DIR, "main.py"), default_timeout=timeout)
+    app.session_state["is_admin"] = True
+    app.run()
+    app.sidebar.selectbox[0].select("Admin Dashboard").run()
+    if app.exception:
+        raise RuntimeError(f"Admin Dashboard failed on {database.DB_PATH}: {app.exception[0].message}")
+
+def bench_queries(n_rows, workdir, results):
+    database.DB_PATH = os.path.join(workdir, f"bench_{n_rows}.db")
+    populate_database(n_rows)
+    # The page queries below are only worth timing if the page that runs them works on this schema
+    check_admin_dashboard()
+    user_id = n_rows // 2
+    page_queries = {
+        "login": ("SELECT * FROM users WHERE email = ? AND password = ?", (f"user{user_id}@example.com", f"pw{user_id}")),
+        "cars_by_user": ("SELECT * FROM cars WHERE user_id = ?", (user_id,)),
+        "bookings_by_user": ("SELECT * FROM bookings WHERE user_id = ?", (user_id,)),
+        "user_by_id": ("SELECT * FROM users WHERE id = ?", (user_id,)),
+    }
+    conn = database.get_db_connection()
+    try:
+        for name, (sql, params) in page_queries.items():
+            results[f"query_{name}[{n_rows}]"] = measure(
+                lambda: conn.execute(sql, params).fetchall(), repeat=7, number=100)
+        results[f"query_admin_dashboard[{n_rows}]"] = measure(lambda: (
+            database.get_booking_status_counts(conn),
+            database.get_service_type_counts(conn),
+            database.get_bookings_page(conn, limit=26),
+        ), repeat=5, number=10)
+        results[f"query_booking_trends[{n_rows}]"] = measure(lambda: (
+            rollups.get_booking_trend(conn, "2026-01-01", "2026-12-31", "week"),
+            rollups.get_approval_latency(conn, "2026-01-01", "2026-12-31", "week"),
+        ), repeat=5, number=10)
+        results[f"query_next_free_slots[{n_rows}]"] = measure(
+            lambda: slots.next_free_slots(conn, "2026-01-01", limit=5), repeat=7, number=100)
+    finally:
+        conn.close()
+        database.get_pool().close_all()
+
+def compare(results, baseline, max_regression):
+    """Print the ratio against the baseline for each shared benchmark; return the names that regressed."""
+    regressions = []
+    for name, stats in sorted(results.items()):
+        if name not in baseline:
+            continue
+        ratio = stats["median_s"] / baseline[name]["median_s"] if baseline[name]["median_s"] else float("inf")
+        flag = "  REGRESSION" if ratio > max_regression else ""
+        print(f"{name:45s} {baseline[name]['median_s'] * 1e3:12.4f} ms -> {stats['median_s'] * 1e3:12.4f} ms  x{ratio:.2f}{flag}")
+        if ratio > max_regression:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1k,100k,1m", help="Dataset sizes for training, inference and DB benchmarks")
+    parser.add_argument("--faq-sizes", default="10k,100k", help="Synthetic FAQ corpus sizes (the real faq.json is always included)")
+    parser.add_argument("--only", choices=["model", "faq", "db", "startup"], action="append", help="Run only these groups")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Results file from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=1.25, help="Median slowdown ratio treated as a regression")
+    args = parser.parse_args(argv)
+
+    groups = set(args.only or ["model", "faq", "db", "startup"])
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size]
+    results = {}
+    if "startup" in groups:
+        bench_startup(results)
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_rows in sizes:
+            if "model" in groups:
+                bench_model(n_rows, workdir, results)
+            if "db" in groups:
+                bench_queries(n_rows, workdir, results)
+        if "faq" in groups:
+            with open(os.path.join(APP_DIR, "faq.json"), "r", encoding="utf-8") as file:
+                faq_data = json.load(file)
+            bench_faq(str(len(faq_data)), faq_data, results)
+            for n_entries in (parse_size(size) for size in args.faq_sizes.split(",") if size):
+                bench_faq(str(n_entries), make_faq_corpus(n_entries), results)
+
+    report = {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "platform": platform.platform(), "sizes": sizes},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed beyond x{args.max_regression}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())